@@ -0,0 +1,36 @@
+"""Add indexes to tb_agendamentos
+
+Revision ID: 3aed83291988
+Revises: f3935718750c
+Create Date: 2026-10-18 10:02:47.530126
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3aed83291988'
+down_revision = 'f3935718750c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tb_agendamentos', schema=None) as batch_op:
+        batch_op.create_index('ix_agendamentos_prof_status_dt',
+                              ['id_profissional', 'status', 'dt_atendimento'], unique=False)
+        batch_op.create_index('ix_agendamentos_user_dt',
+                              ['id_user', 'dt_atendimento'], unique=False)
+        # Parcial no SQLite/PostgreSQL; no MySQL vira um índice comum
+        batch_op.create_index('ix_agendamentos_prof_ativos',
+                              ['id_profissional', 'dt_atendimento', 'dt_fim'], unique=False,
+                              sqlite_where=sa.text("status != 'cancelado'"),
+                              postgresql_where=sa.text("status != 'cancelado'"))
+
+
+def downgrade():
+    with op.batch_alter_table('tb_agendamentos', schema=None) as batch_op:
+        batch_op.drop_index('ix_agendamentos_prof_ativos')
+        batch_op.drop_index('ix_agendamentos_user_dt')
+        batch_op.drop_index('ix_agendamentos_prof_status_dt')
@@ -0,0 +1,32 @@
+"""Store tb_token_revogado.revogado_em with microseconds on MySQL
+
+Revision ID: c41d7e2a9f58
+Revises: 6b246feb3d43
+Create Date: 2026-10-18 18:40:12.204517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7e2a9f58'
+down_revision = '6b246feb3d43'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # DATETIME do MySQL guarda só segundos; SQLite e PostgreSQL já guardam microssegundos
+    if op.get_bind().dialect.name == 'mysql':
+        with op.batch_alter_table('tb_token_revogado', schema=None) as batch_op:
+            batch_op.alter_column('revogado_em', existing_type=sa.DateTime(),
+                                  type_=mysql.DATETIME(fsp=6), existing_nullable=False)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'mysql':
+        with op.batch_alter_table('tb_token_revogado', schema=None) as batch_op:
+            batch_op.alter_column('revogado_em', existing_type=mysql.DATETIME(fsp=6),
+                                  type_=sa.DateTime(), existing_nullable=False)
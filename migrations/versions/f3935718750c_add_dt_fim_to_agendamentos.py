@@ -0,0 +1,67 @@
+"""Add dt_fim to tb_agendamentos
+
+Revision ID: f3935718750c
+Revises: bb7e1362d6e7
+Create Date: 2026-10-18 09:12:04.118203
+
+"""
+from datetime import timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3935718750c'
+down_revision = 'bb7e1362d6e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('tb_agendamentos', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('dt_fim', sa.DateTime(), nullable=True))
+
+    # Preenche o fim dos agendamentos existentes a partir da duração do serviço
+    agendamentos = sa.table(
+        'tb_agendamentos',
+        sa.column('id', sa.Integer()),
+        sa.column('dt_atendimento', sa.DateTime()),
+        sa.column('id_servico', sa.Integer()),
+        sa.column('dt_fim', sa.DateTime()),
+    )
+    servicos = sa.table(
+        'tb_servico',
+        sa.column('id', sa.Integer()),
+        sa.column('horario_duracao', sa.Float()),
+    )
+
+    conexao = op.get_bind()
+    linhas = conexao.execute(
+        sa.select(agendamentos.c.id, agendamentos.c.dt_atendimento, servicos.c.horario_duracao)
+        .select_from(agendamentos.outerjoin(servicos, agendamentos.c.id_servico == servicos.c.id))
+    ).fetchall()
+
+    atualizacoes = [
+        {
+            'ag_id': linha.id,
+            'ag_dt_fim': linha.dt_atendimento + timedelta(minutes=linha.horario_duracao or 60),
+        }
+        for linha in linhas
+    ]
+
+    if atualizacoes:
+        conexao.execute(
+            agendamentos.update()
+            .where(agendamentos.c.id == sa.bindparam('ag_id'))
+            .values(dt_fim=sa.bindparam('ag_dt_fim')),
+            atualizacoes
+        )
+
+    with op.batch_alter_table('tb_agendamentos', schema=None) as batch_op:
+        batch_op.alter_column('dt_fim', existing_type=sa.DateTime(), nullable=False)
+
+
+def downgrade():
+    with op.batch_alter_table('tb_agendamentos', schema=None) as batch_op:
+        batch_op.drop_column('dt_fim')
@@ -0,0 +1,57 @@
+# Mede o tempo de inicialização da aplicação em processos novos:
+#   - import das bibliotecas (Flask, SQLAlchemy, ...), separado do código do projeto
+#   - import de connection.py (configuração; não abre conexão com o banco)
+#   - import de src (criação do app, extensões, models e rotas)
+#   - primeira requisição e média das seguintes (custo fixo por requisição)
+# Uso, a partir da raiz do projeto:
+#   python scripts/tempo_inicializacao.py [repeticoes]
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Código executado em cada processo novo; imprime os tempos em milissegundos
+MEDICAO = r'''
+import json, time
+inicio_bibliotecas = time.perf_counter()
+import dotenv, flask, flask_cors, flask_marshmallow, flask_migrate, flask_restful, flask_sqlalchemy, jwt, passlib.context, sqlalchemy
+inicio = time.perf_counter()
+import connection
+depois_connection = time.perf_counter()
+from src import app
+depois_app = time.perf_counter()
+cliente = app.test_client()
+cliente.get("/rota-inexistente")
+depois_primeira = time.perf_counter()
+for _ in range(200):
+    cliente.get("/rota-inexistente")
+fim = time.perf_counter()
+print(json.dumps({
+    "import_bibliotecas_ms": (inicio - inicio_bibliotecas) * 1000,
+    "import_connection_ms": (depois_connection - inicio) * 1000,
+    "import_app_ms": (depois_app - depois_connection) * 1000,
+    "primeira_requisicao_ms": (depois_primeira - depois_app) * 1000,
+    "requisicao_media_ms": (fim - depois_primeira) * 1000 / 200,
+}))
+'''
+
+
+def medir(repeticoes: int):
+    amostras = []
+    for _ in range(repeticoes):
+        saida = subprocess.run([sys.executable, '-c', MEDICAO], cwd=RAIZ, check=True,
+                               capture_output=True, text=True).stdout
+        amostras.append(json.loads(saida.strip().splitlines()[-1]))
+    return {chave: statistics.median(amostra[chave] for amostra in amostras)
+            for chave in amostras[0]}
+
+
+if __name__ == '__main__':
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    print(f'Mediana de {repeticoes} processos novos:')
+    for chave, valor in medir(repeticoes).items():
+        print(f'  {chave:<24} {valor:8.2f} ms')
@@ -1,4 +1,4 @@
-from flask import Flask, request
+from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_marshmallow import Marshmallow
@@ -14,11 +14,19 @@ ma = Marshmallow(app)
 api = Api(app)
 CORS(app)
 
-@app.before_request
-def create_tables():
-    if request.endpoint == "index":
-        db.create_all()
+# O schema é criado/atualizado pelas migrations do Alembic, fora do ciclo de requisições:
+#   flask --app app init-db   (equivalente a "flask db upgrade")
+@app.cli.command("init-db")
+def init_db():
+    """Aplica as migrations pendentes no banco configurado"""
+    from flask_migrate import upgrade
+    upgrade()
 
-from .models import agendamento_model, login_model, profissional_model, servicos_model, usuario_model
+from .models import agendamento_model, agenda_bloqueio_model, estatistica_profissional_model, login_model, profissional_model, servicos_model, token_revogado_model, usuario_model
 
-from .views import usuario_view
\ No newline at end of file
+from .views import usuario_view, agendamento_view, profissional_view, analise_view
+
+# Autenticação: o token Bearer é verificado uma vez por requisição e o usuário fica em g.user_id;
+# token recusado só bloqueia as rotas marcadas com requer_autenticacao
+from .services.login_services import autenticar_requisicao
+app.before_request(autenticar_requisicao)
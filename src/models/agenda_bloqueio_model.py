@@ -0,0 +1,43 @@
+from sqlalchemy.exc import IntegrityError
+from src import db
+
+
+# Uma linha por (profissional, dia) usada como trava da agenda daquele dia.
+# Quem vai gravar agendamentos atualiza a linha antes de conferir conflitos; o banco
+# serializa só as transações que disputam o mesmo profissional no mesmo dia.
+class AgendaBloqueioModel(db.Model):
+    __tablename__ = "tb_agenda_bloqueio"
+
+    id_profissional = db.Column(db.Integer, db.ForeignKey('tb_profissional.id'), primary_key = True)
+    data = db.Column(db.Date, primary_key = True)
+    versao = db.Column(db.Integer, nullable = False, default = 0)
+
+    @staticmethod
+    def reservar(profissional_id, datas):
+        """Trava a agenda do profissional nos dias informados até o fim da transação"""
+
+        tabela = AgendaBloqueioModel.__table__
+
+        # Ordem fixa dos dias evita deadlock entre reservas que envolvem mais de um dia; entre
+        # profissionais, quem chama reserva em ordem de id (ver AgendamentoModel._verificar_conflitos)
+        for data in sorted(set(datas)):
+            filtro = (tabela.c.id_profissional == profissional_id) & (tabela.c.data == data)
+
+            while True:
+                # O UPDATE trava a linha (MySQL/PostgreSQL) ou pega o lock de escrita (SQLite)
+                resultado = db.session.execute(
+                    tabela.update().where(filtro).values(versao=tabela.c.versao + 1)
+                )
+                if resultado.rowcount:
+                    break
+
+                # Primeira reserva do dia: cria a linha já travada pela própria inserção
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(
+                            tabela.insert().values(id_profissional=profissional_id, data=data, versao=1)
+                        )
+                    break
+                except IntegrityError:
+                    # Outra transação criou a linha ao mesmo tempo; volta ao UPDATE
+                    continue
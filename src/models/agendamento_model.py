@@ -1,19 +1,53 @@
 # importação das bibliotecas necessárias
+import base64
 from datetime import datetime, timedelta
-from sqlalchemy import Column, Integer, DateTime, String, ForeignKey, Numeric, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, DateTime, String, ForeignKey, Numeric, Text, Index, text, and_, or_, event, select
+from sqlalchemy.orm import relationship, Session
 from src import db
 from . import usuario_model, profissional_model, servicos_model
+from .agenda_bloqueio_model import AgendaBloqueioModel
+from .estatistica_profissional_model import EstatisticaProfissionalModel
+from .escrita import escrita_serializada
+from ..services.indice_agenda import indice_agenda
+from ..services.catalogo_servicos import catalogo_servicos
+from ..services.cache_disponibilidade import cache_disponibilidade
+
+# Erro de conflito de horário detectado dentro da transação de gravação
+class ConflitoHorarioError(Exception):
+    pass
+
 
 # criação da tabela de agendamentos
 class AgendamentoModel(db.Model):
 
     __tablename__ = 'tb_agendamentos'
     
+    # Tamanho de página das listagens paginadas por cursor
+    LIMITE_PADRAO = 100
+    LIMITE_MAXIMO = 500
+    
+    # Maior duração de um agendamento (um serviço); as consultas de conflito só olham
+    # agendamentos que começaram até essa duração antes do período, sem varrer o histórico
+    DURACAO_MAXIMA = timedelta(hours=12)
+    
+    # Índices das consultas mais frequentes (ver migração 3aed83291988)
+    __table_args__ = (
+        # Agenda do profissional filtrada por status e período
+        Index('ix_agendamentos_prof_status_dt', 'id_profissional', 'status', 'dt_atendimento'),
+        # Histórico do usuário ordenado por data
+        Index('ix_agendamentos_user_dt', 'id_user', 'dt_atendimento'),
+        # Agendamentos ativos do profissional (disponibilidade e conflitos)
+        Index('ix_agendamentos_prof_ativos', 'id_profissional', 'dt_atendimento', 'dt_fim',
+              sqlite_where=text("status != 'cancelado'"),
+              postgresql_where=text("status != 'cancelado'")),
+    )
+    
     # Campos principais
     id = Column(Integer, primary_key=True, autoincrement=True)
     dt_agendamento = Column(DateTime, nullable=False, default=datetime.utcnow)
     dt_atendimento = Column(DateTime, nullable=False)
+    # Fim do atendimento, gravado na criação/remarcação para as consultas de conflito
+    dt_fim = Column(DateTime, nullable=False)
     
     # Chaves estrangeiras
     id_user = Column(Integer, ForeignKey('tb_usuario.id'), nullable=False)
@@ -38,6 +72,7 @@ class AgendamentoModel(db.Model):
             'id': self.id,
             'dt_agendamento': self.dt_agendamento.isoformat() if self.dt_agendamento else None,
             'dt_atendimento': self.dt_atendimento.isoformat() if self.dt_atendimento else None,
+            'dt_fim': self.dt_fim.isoformat() if self.dt_fim else None,
             'id_user': self.id_user,
             'id_profissional': self.id_profissional,
             'id_servico': self.id_servico,
@@ -48,39 +83,162 @@ class AgendamentoModel(db.Model):
         }
     
     # Função para salvar um agendamento e feedback caso dê erro
+    # (mesmo caminho de salvar_varios: conflitos conferidos, índice e cache atualizados)
     def salvar(self):
 
-        try:
-            db.session.add(self)
-            db.session.commit()
-            return self
-        except Exception as e:
-            db.session.rollback()
-            raise Exception(f"Erro ao salvar agendamento: {str(e)}")
+        if self.dt_fim is None:
+            self.dt_fim = self.calcular_dt_fim()
+        return AgendamentoModel.salvar_varios([self])[0]
+    
+    # Função para salvar vários agendamentos de uma vez: confere conflitos e insere
+    # tudo na mesma transação, com um único commit
+    @staticmethod
+    def salvar_varios(agendamentos):
+
+        with escrita_serializada():
+            try:
+                AgendamentoModel._verificar_conflitos(agendamentos)
+                db.session.add_all(agendamentos)
+                db.session.flush()
+                ids = [agendamento.id for agendamento in agendamentos]
+                db.session.commit()
+                # Recarrega todos os registros expirados pelo commit em uma única consulta
+                AgendamentoModel.query.filter(AgendamentoModel.id.in_(ids)).all()
+            except ConflitoHorarioError:
+                db.session.rollback()
+                raise
+            except Exception as e:
+                db.session.rollback()
+                raise Exception(f"Erro ao salvar agendamentos: {str(e)}")
+        
+        for agendamento in agendamentos:
+            indice_agenda.adicionar(agendamento.id_profissional, agendamento.id,
+                                    agendamento.dt_atendimento, agendamento.dt_fim)
+            cache_disponibilidade.invalidar_periodo(agendamento.id_profissional,
+                                                    agendamento.dt_atendimento, agendamento.dt_fim)
+        return agendamentos
+    
+    # Função para conferir no banco, dentro da transação atual, se os agendamentos novos
+    # ou remarcados conflitam com algum já gravado (uma consulta por profissional e dia).
+    # Antes da consulta a agenda dos dias envolvidos é travada, de modo que duas
+    # gravações concorrentes para o mesmo profissional/dia nunca passem juntas; a
+    # leitura com trava fica restrita ao dia, sem travar o histórico do profissional
+    @staticmethod
+    def _verificar_conflitos(agendamentos):
+
+        por_profissional = {}
+        for agendamento in agendamentos:
+            if agendamento.dt_fim - agendamento.dt_atendimento > AgendamentoModel.DURACAO_MAXIMA:
+                raise ValueError("Duração do atendimento acima do máximo permitido")
+            por_profissional.setdefault(agendamento.id_profissional, []).append(agendamento)
+        
+        # Trava primeiro todos os (profissional, dia) envolvidos, sempre na mesma ordem:
+        # lotes com vários profissionais em ordens diferentes não se bloqueiam mutuamente
+        for profissional_id, novos in sorted(por_profissional.items()):
+            AgendaBloqueioModel.reservar(
+                profissional_id, [dia for ag in novos for dia in ag.dias_atendimento()]
+            )
+        
+        for profissional_id, novos in sorted(por_profissional.items()):
+            # Agendamentos remarcados não conflitam com o próprio registro
+            ids_verificados = {ag.id for ag in novos if ag.id is not None}
+            
+            por_dia = {}
+            for novo in novos:
+                por_dia.setdefault(novo.dt_atendimento.date(), []).append(novo)
+            
+            for dia in sorted(por_dia):
+                do_dia = por_dia[dia]
+                existentes = AgendamentoModel.find_conflitos_horario(
+                    profissional_id,
+                    min(ag.dt_atendimento for ag in do_dia),
+                    max(ag.dt_fim for ag in do_dia),
+                    bloquear=True
+                )
+                for novo in do_dia:
+                    for existente in existentes:
+                        if existente.id in ids_verificados:
+                            continue
+                        if existente.dt_atendimento < novo.dt_fim and existente.dt_fim > novo.dt_atendimento:
+                            raise ConflitoHorarioError("Horário não disponível para o profissional")
     
     # Função para atualizar algum agendamento e dar algum feedback de erro.
     def atualizar(self, **kwargs):
 
-        try:
-            for key, value in kwargs.items():
-                if hasattr(self, key):
-                    setattr(self, key, value)
-            db.session.commit()
-            return self
-        except Exception as e:
-            db.session.rollback()
-            raise Exception(f"Erro ao atualizar agendamento: {str(e)}")
+        with escrita_serializada():
+            try:
+                inicio_anterior = self.dt_atendimento
+                fim_anterior = self.dt_fim
+                status_anterior = self.status
+            
+                for key, value in kwargs.items():
+                    if hasattr(self, key):
+                        setattr(self, key, value)
+            
+                # Na remarcação o fim acompanha o novo início, mantendo a duração
+                if self.dt_atendimento != inicio_anterior and 'dt_fim' not in kwargs:
+                    if fim_anterior:
+                        self.dt_fim = self.dt_atendimento + (fim_anterior - inicio_anterior)
+                    else:
+                        self.dt_fim = self.calcular_dt_fim()
+            
+                # Remarcação de agendamento ativo: trava os dias e confere conflitos na mesma transação
+                if self.dt_atendimento != inicio_anterior and self.status != 'cancelado':
+                    AgendamentoModel._verificar_conflitos([self])
+                db.session.commit()
+            
+                # Mantém o índice de horários ocupados e o cache de disponibilidade
+                # em dia com a remarcação/cancelamento
+                if inicio_anterior != self.dt_atendimento or status_anterior != self.status:
+                    if status_anterior != 'cancelado':
+                        indice_agenda.remover(self.id_profissional, self.id,
+                                              inicio_anterior, fim_anterior)
+                    if self.status != 'cancelado':
+                        indice_agenda.adicionar(self.id_profissional, self.id,
+                                                self.dt_atendimento, self.dt_fim)
+                    cache_disponibilidade.invalidar_periodo(self.id_profissional,
+                                                            inicio_anterior, fim_anterior)
+                    cache_disponibilidade.invalidar_periodo(self.id_profissional,
+                                                            self.dt_atendimento, self.dt_fim)
+                return self
+            except ConflitoHorarioError:
+                db.session.rollback()
+                raise
+            except Exception as e:
+                db.session.rollback()
+                raise Exception(f"Erro ao atualizar agendamento: {str(e)}")
     
     # Função para deletar e dar algum feedback de erro.
     def deletar(self):
 
-        try:
-            db.session.delete(self)
-            db.session.commit()
-            return True
-        except Exception as e:
-            db.session.rollback()
-            raise Exception(f"Erro ao deletar agendamento: {str(e)}")
+        with escrita_serializada():
+            try:
+                db.session.delete(self)
+                db.session.commit()
+                indice_agenda.remover(self.id_profissional, self.id, self.dt_atendimento, self.dt_fim)
+                cache_disponibilidade.invalidar_periodo(self.id_profissional, self.dt_atendimento, self.dt_fim)
+                return True
+            except Exception as e:
+                db.session.rollback()
+                raise Exception(f"Erro ao deletar agendamento: {str(e)}")
+    
+    # Função para listar os dias ocupados pelo atendimento
+    def dias_atendimento(self):
+
+        dia = self.dt_atendimento.date()
+        ultimo = (self.dt_fim - timedelta(microseconds=1)).date() if self.dt_fim > self.dt_atendimento else dia
+        dias = []
+        while dia <= ultimo:
+            dias.append(dia)
+            dia += timedelta(days=1)
+        return dias
+    
+    # Função para calcular o fim do atendimento a partir da duração do serviço
+    def calcular_dt_fim(self):
+
+        servico = catalogo_servicos.obter(self.id_servico)
+        duracao = servico.horario_duracao if servico and servico.horario_duracao else 60
+        return self.dt_atendimento + timedelta(minutes=duracao)
     
     # Função para poder cancelar algum agendamento que se for em menos de duas horas, vai ser gratuito
     def pode_cancelar_gratuito(self):
@@ -117,6 +275,54 @@ class AgendamentoModel(db.Model):
     def find_by_user(user_id):
 
         return AgendamentoModel.query.filter_by(id_user=user_id).all()
+    #método para paginar uma consulta por cursor (dt_atendimento, id), sem OFFSET
+    @staticmethod
+    def paginar(query, limite=None, cursor=None, decrescente=False):
+
+        # Limite ausente usa o padrão; valores fora de [1, LIMITE_MAXIMO] são ajustados
+        limite = max(1, min(limite or AgendamentoModel.LIMITE_PADRAO, AgendamentoModel.LIMITE_MAXIMO))
+        
+        if cursor:
+            cursor_dt, cursor_id = AgendamentoModel.decodificar_cursor(cursor)
+            if decrescente:
+                query = query.filter(or_(
+                    AgendamentoModel.dt_atendimento < cursor_dt,
+                    and_(AgendamentoModel.dt_atendimento == cursor_dt, AgendamentoModel.id < cursor_id)
+                ))
+            else:
+                query = query.filter(or_(
+                    AgendamentoModel.dt_atendimento > cursor_dt,
+                    and_(AgendamentoModel.dt_atendimento == cursor_dt, AgendamentoModel.id > cursor_id)
+                ))
+        
+        if decrescente:
+            query = query.order_by(AgendamentoModel.dt_atendimento.desc(), AgendamentoModel.id.desc())
+        else:
+            query = query.order_by(AgendamentoModel.dt_atendimento, AgendamentoModel.id)
+        
+        # Busca um item a mais só para saber se existe próxima página
+        itens = query.limit(limite + 1).all()
+        proximo_cursor = None
+        if len(itens) > limite:
+            itens = itens[:limite]
+            proximo_cursor = AgendamentoModel.codificar_cursor(itens[-1])
+        
+        return itens, proximo_cursor
+    
+    @staticmethod
+    def codificar_cursor(agendamento):
+
+        chave = f"{agendamento.dt_atendimento.isoformat()}|{agendamento.id}"
+        return base64.urlsafe_b64encode(chave.encode()).decode()
+    
+    @staticmethod
+    def decodificar_cursor(cursor):
+
+        try:
+            dt_texto, id_texto = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            return datetime.fromisoformat(dt_texto), int(id_texto)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ValueError("Cursor inválido") from e
     #método para listar pelo id do profissional
     @staticmethod
     def find_by_profissional_data(profissional_id, data):
@@ -129,13 +335,78 @@ class AgendamentoModel(db.Model):
             AgendamentoModel.dt_atendimento.between(inicio_dia, fim_dia),
             AgendamentoModel.status != 'cancelado'
         ).order_by(AgendamentoModel.dt_atendimento).all()
-    #método para filtrar os conflitos os cancelamentos no agendamento
+    #método para listar os agendamentos ativos de vários profissionais em um período de dias
     @staticmethod
-    def find_conflitos_horario(profissional_id, dt_inicio, dt_fim):
+    def find_by_profissionais_periodo(profissionais_ids, data_inicio, data_fim):
 
+        inicio = datetime.combine(data_inicio, datetime.min.time())
+        fim = datetime.combine(data_fim, datetime.max.time())
+        
         return AgendamentoModel.query.filter(
+            AgendamentoModel.id_profissional.in_(profissionais_ids),
+            AgendamentoModel.dt_atendimento.between(inicio, fim),
+            AgendamentoModel.status != 'cancelado'
+        ).order_by(AgendamentoModel.id_profissional, AgendamentoModel.dt_atendimento).all()
+    #método para filtrar os agendamentos que ocupam parte do período [dt_inicio, dt_fim)
+    @staticmethod
+    def find_conflitos_horario(profissional_id, dt_inicio, dt_fim, ignorar_id=None, bloquear=False):
+
+        # O limite inferior de dt_atendimento mantém a busca no trecho do índice perto do período
+        query = AgendamentoModel.query.filter(
             AgendamentoModel.id_profissional == profissional_id,
             AgendamentoModel.status != 'cancelado',
+            AgendamentoModel.dt_atendimento > dt_inicio - AgendamentoModel.DURACAO_MAXIMA,
             AgendamentoModel.dt_atendimento < dt_fim,
-            # Assumindo que temos um campo dt_fim ou calculamos baseado na duração
-        ).all()
\ No newline at end of file
+            AgendamentoModel.dt_fim > dt_inicio
+        )
+        
+        if ignorar_id is not None:
+            query = query.filter(AgendamentoModel.id != ignorar_id)
+        
+        # Leitura com trava, para enxergar o último estado gravado dentro da transação
+        if bloquear:
+            query = query.with_for_update()
+        
+        return query.all()
+
+# Estatísticas diárias por profissional: antes de cada flush, os agendamentos criados,
+# alterados ou removidos viram variações somadas em tb_estatistica_profissional,
+# dentro da mesma transação da gravação
+@event.listens_for(Session, 'before_flush')
+def _atualizar_estatisticas(session, flush_context, instances):
+
+    novos = [obj for obj in session.new if isinstance(obj, AgendamentoModel)]
+    alterados = [obj for obj in session.dirty
+                 if isinstance(obj, AgendamentoModel) and session.is_modified(obj)]
+    removidos = [obj for obj in session.deleted if isinstance(obj, AgendamentoModel)]
+    if not (novos or alterados or removidos):
+        return
+
+    variacoes = {}
+
+    def somar(profissional_id, dt_atendimento, status, valor_total, taxa, sinal):
+        chave = (profissional_id, dt_atendimento.date(), status or 'agendado')
+        variacao = variacoes.setdefault(chave, [0, 0.0, 0.0])
+        variacao[0] += sinal
+        variacao[1] += sinal * float(valor_total or 0)
+        variacao[2] += sinal * float(taxa or 0)
+
+    conexao = session.connection()
+
+    # Estado ainda gravado no banco dos agendamentos que vão mudar ou sair
+    ids = [obj.id for obj in alterados + removidos if obj.id is not None]
+    if ids:
+        tabela = AgendamentoModel.__table__
+        anteriores = conexao.execute(
+            select(tabela.c.id_profissional, tabela.c.dt_atendimento, tabela.c.status,
+                   tabela.c.valor_total, tabela.c.taxa_cancelamento)
+            .where(tabela.c.id.in_(ids))
+        )
+        for linha in anteriores:
+            somar(*linha, sinal=-1)
+
+    for obj in novos + alterados:
+        somar(obj.id_profissional, obj.dt_atendimento, obj.status,
+              obj.valor_total, obj.taxa_cancelamento, sinal=1)
+
+    EstatisticaProfissionalModel.aplicar_variacoes(conexao, variacoes)
@@ -0,0 +1,24 @@
+# Caminho único de escrita para o SQLite
+# O SQLite aceita um escritor por vez: em vez de deixar as transações do processo
+# disputarem o arquivo até estourar o busy_timeout ("database is locked"), as
+# gravações passam uma de cada vez por esta trava, enquanto as leituras seguem em
+# paralelo (no modo WAL). Em outros bancos a trava não é usada.
+
+from contextlib import contextmanager
+from threading import RLock
+from src import db
+
+
+_trava_escrita = RLock()
+
+
+@contextmanager
+def escrita_serializada():
+    """Executa o bloco como o único escritor do processo quando o banco é SQLite"""
+
+    if db.engine.dialect.name != 'sqlite':
+        yield
+        return
+
+    with _trava_escrita:
+        yield
@@ -0,0 +1,69 @@
+from decimal import Decimal
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from src import db
+
+
+# Totais diários dos agendamentos de cada profissional, por status.
+# Mantidos pela própria gravação dos agendamentos (ver AgendamentoModel), de modo que
+# perfil e estatísticas do profissional não precisam varrer tb_agendamentos.
+class EstatisticaProfissionalModel(db.Model):
+    __tablename__ = "tb_estatistica_profissional"
+
+    id_profissional = db.Column(db.Integer, db.ForeignKey('tb_profissional.id'), primary_key = True)
+    data = db.Column(db.Date, primary_key = True)
+    status = db.Column(db.String(20), primary_key = True)
+    quantidade = db.Column(db.Integer, nullable = False, default = 0)
+    # Soma de valor_total e de taxa_cancelamento dos agendamentos do dia/status
+    receita = db.Column(db.Numeric(12, 2), nullable = False, default = 0)
+    taxas_cancelamento = db.Column(db.Numeric(12, 2), nullable = False, default = 0)
+
+    @staticmethod
+    def aplicar_variacoes(conexao, variacoes):
+        """Soma as variações {(profissional, data, status): [quantidade, receita, taxas]}"""
+
+        tabela = EstatisticaProfissionalModel.__table__
+        dialeto = conexao.dialect.name
+
+        # Ordem fixa para que transações concorrentes travem as linhas na mesma sequência
+        for (profissional_id, data, status), (quantidade, receita, taxas) in sorted(variacoes.items()):
+            if not quantidade and not receita and not taxas:
+                continue
+
+            valores = {
+                'id_profissional': profissional_id,
+                'data': data,
+                'status': status,
+                'quantidade': quantidade,
+                'receita': Decimal(str(receita)),
+                'taxas_cancelamento': Decimal(str(taxas))
+            }
+
+            # Um único comando por linha: cria com a variação ou soma à linha existente
+            if dialeto in ('sqlite', 'postgresql'):
+                insert = (sqlite if dialeto == 'sqlite' else postgresql).insert(tabela).values(**valores)
+                comando = insert.on_conflict_do_update(
+                    index_elements=['id_profissional', 'data', 'status'],
+                    set_={
+                        'quantidade': tabela.c.quantidade + insert.excluded.quantidade,
+                        'receita': tabela.c.receita + insert.excluded.receita,
+                        'taxas_cancelamento': tabela.c.taxas_cancelamento + insert.excluded.taxas_cancelamento
+                    }
+                )
+                conexao.execute(comando)
+            elif dialeto in ('mysql', 'mariadb'):
+                insert = mysql.insert(tabela).values(**valores)
+                conexao.execute(insert.on_duplicate_key_update(
+                    quantidade=tabela.c.quantidade + insert.inserted.quantidade,
+                    receita=tabela.c.receita + insert.inserted.receita,
+                    taxas_cancelamento=tabela.c.taxas_cancelamento + insert.inserted.taxas_cancelamento
+                ))
+            else:
+                filtro = ((tabela.c.id_profissional == profissional_id) &
+                          (tabela.c.data == data) & (tabela.c.status == status))
+                resultado = conexao.execute(tabela.update().where(filtro).values(
+                    quantidade=tabela.c.quantidade + valores['quantidade'],
+                    receita=tabela.c.receita + valores['receita'],
+                    taxas_cancelamento=tabela.c.taxas_cancelamento + valores['taxas_cancelamento']
+                ))
+                if not resultado.rowcount:
+                    conexao.execute(tabela.insert().values(**valores))
@@ -0,0 +1,37 @@
+from datetime import datetime
+from sqlalchemy.dialects import mysql
+from src import db
+from .escrita import escrita_serializada
+
+
+# Revogações de token gravadas para sobreviver a reinícios e chegar aos outros processos.
+# Com jti preenchido revoga um token; sem jti revoga os tokens do usuário emitidos até
+# revogado_em. A linha deixa de ser lida depois de expira_em.
+class TokenRevogadoModel(db.Model):
+    __tablename__ = "tb_token_revogado"
+
+    id = db.Column(db.Integer, primary_key = True, autoincrement = True)
+    jti = db.Column(db.String(64), nullable = True, unique = True)
+    id_user = db.Column(db.Integer, db.ForeignKey('tb_usuario.id'), nullable = True)
+    # Com microssegundos também no MySQL: é comparado ao iat (com frações) dos tokens
+    revogado_em = db.Column(db.DateTime().with_variant(mysql.DATETIME(fsp=6), 'mysql'),
+                            nullable = False, default = datetime.utcnow)
+    expira_em = db.Column(db.DateTime, nullable = False, index = True)
+
+    def salvar(self):
+        with escrita_serializada():
+            try:
+                db.session.add(self)
+                db.session.commit()
+                return self
+            except Exception as e:
+                db.session.rollback()
+                raise Exception(f"Erro ao revogar token: {str(e)}")
+
+    @staticmethod
+    def find_validos(depois_do_id=0):
+        """Revogações ainda não expiradas gravadas depois do id informado"""
+        return TokenRevogadoModel.query.filter(
+            TokenRevogadoModel.id > depois_do_id,
+            TokenRevogadoModel.expira_em > datetime.utcnow()
+        ).order_by(TokenRevogadoModel.id).all()
@@ -1,5 +1,5 @@
 from src import db
-from passlib.hash import pbkdf2_sha256 as sha256
+from ..services.senha_hasher import senha_hasher
 
 class UsuarioModel(db.Model):
     __tablename__ = "tb_usuario"
@@ -11,7 +11,11 @@ class UsuarioModel(db.Model):
     senha = db.Column(db.String(255), nullable = False)
 
     def gen_senha(self, senha):
-        self.senha = sha256.hash(senha)
+        self.senha = senha_hasher.gerar(senha)
     
     def verificar_senha(self, senha):
-        return sha256.verify(senha, self.senha)
\ No newline at end of file
+        # Hash gerado com parâmetros antigos é refeito; fica gravado no próximo commit
+        valida, novo_hash = senha_hasher.verificar_e_atualizar(senha, self.senha)
+        if valida and novo_hash:
+            self.senha = novo_hash
+        return valida
\ No newline at end of file
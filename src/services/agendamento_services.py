@@ -1,12 +1,18 @@
 # Service para gerenciamento de agendamentos
 # Contém toda a lógica de negócio relacionada aos agendamentos
 
-from datetime import datetime, timedelta, time
+import time
+from datetime import datetime, timedelta
 from typing import List, Dict
-from ..models.agendamento_model import AgendamentoModel
-from ..models.servicos_model import ServicoModel
+from sqlalchemy.orm import joinedload
+from ..models.agendamento_model import AgendamentoModel, ConflitoHorarioError
 from ..models.profissional_model import ProfissionalModel
 from ..models.usuario_model import UsuarioModel
+from .indice_agenda import IndiceAgenda, indice_agenda
+from .catalogo_servicos import catalogo_servicos
+from .grade_horarios import obter_grade
+from .cache_disponibilidade import cache_disponibilidade
+from .solicitacao_agendamento import SolicitacaoAgendamento
 from src import db
 
 
@@ -29,66 +35,65 @@ class AgendamentoService:
         'pintura': 120
     }
     
+    # Período máximo aceito pela consulta de disponibilidade em lote
+    LIMITE_DIAS_LOTE = 31
+    
+    # Itens por bloco gravado na importação em lote, e tamanho máximo do lote
+    LOTE_IMPORTACAO = 500
+    LIMITE_IMPORTACAO = 10000
+    
     @staticmethod
     def criar_agendamento(dt_atendimento: datetime, id_user: int, 
                          id_profissional: int, servicos_ids: List[int],
                          observacoes: str = None) -> Dict:
         """Cria agendamento(s) para os serviços solicitados"""
         
+        solicitacao = SolicitacaoAgendamento(
+            dt_atendimento, id_user, id_profissional, servicos_ids, observacoes)
+        return AgendamentoService.criar_agendamento_solicitacao(solicitacao)
+    
+    @staticmethod
+    def criar_agendamento_solicitacao(solicitacao: SolicitacaoAgendamento) -> Dict:
+        """Cria agendamento(s) a partir de uma solicitação, resolvendo-a se ainda não foi"""
+        
         try:
-            # Valida dados básicos
-            if not AgendamentoService._validar_dados_basicos(
-                dt_atendimento, id_user, id_profissional, servicos_ids):
-                return {"erro": "Dados inválidos fornecidos"}
-            
-            # Não permite agendar para data/hora passadas
-            if dt_atendimento <= datetime.utcnow():
-                return {"erro": "Não é possível agendar para datas passadas"}
-            
-            # Verifica se horário está dentro do funcionamento
-            if not AgendamentoService._verificar_horario_funcionamento(dt_atendimento):
-                return {"erro": "Horário fora do funcionamento do estabelecimento"}
-            
-            # Busca os serviços e calcula duração e valor total
-            servicos = []
+            # Valida dados básicos, data passada e horário de funcionamento
+            erro = AgendamentoService._validar_solicitacao(
+                solicitacao.dt_atendimento, solicitacao.id_user,
+                solicitacao.id_profissional, solicitacao.servicos_ids)
+            if erro:
+                return {"erro": erro}
+            
+            # Usuário, profissional e serviços já conferidos pela view são reaproveitados
+            erro = solicitacao.resolver()
+            if erro:
+                return {"erro": erro[0]}
+            
+            # Calcula duração e valor total a partir dos serviços resolvidos
             duracao_total = 0
             valor_total = 0
             
-            for servico_id in servicos_ids:
-                servico = ServicoModel.query.get(servico_id)
-                if not servico:
-                    return {"erro": f"Serviço com ID {servico_id} não encontrado"}
-                
-                servicos.append(servico)
+            for servico in solicitacao.servicos:
                 duracao_servico = servico.horario_duracao if servico.horario_duracao else 60
                 duracao_total += duracao_servico
                 valor_total += float(servico.valor)
             
             # Verifica se o profissional está disponível
-            dt_fim = dt_atendimento + timedelta(minutes=duracao_total)
+            dt_fim = solicitacao.dt_atendimento + timedelta(minutes=duracao_total)
             if not AgendamentoService._verificar_disponibilidade(
-                id_profissional, dt_atendimento, dt_fim):
+                solicitacao.id_profissional, solicitacao.dt_atendimento, dt_fim):
                 return {"erro": "Horário não disponível para o profissional"}
             
-            # Cria um agendamento para cada serviço
-            agendamentos_criados = []
-            dt_atual = dt_atendimento
+            # Cria um agendamento para cada serviço, gravados juntos em uma transação
+            agendamentos_criados = AgendamentoService._montar_agendamentos(
+                solicitacao.dt_atendimento, solicitacao.id_user, solicitacao.id_profissional,
+                solicitacao.servicos, solicitacao.observacoes)
             
-            for i, servico in enumerate(servicos):
-                duracao_servico = servico.horario_duracao if servico.horario_duracao else 60
-                
-                agendamento = AgendamentoModel()
-                agendamento.dt_atendimento = dt_atual
-                agendamento.id_user = id_user
-                agendamento.id_profissional = id_profissional
-                agendamento.id_servico = servico.id
-                agendamento.observacoes = observacoes if i == 0 else None
-                agendamento.valor_total = float(servico.valor)
-                
-                agendamento.salvar()
-                agendamentos_criados.append(agendamento)
-                
-                dt_atual += timedelta(minutes=duracao_servico)
+            # Confere conflitos no banco e insere na mesma transação
+            try:
+                AgendamentoModel.salvar_varios(agendamentos_criados)
+            except ConflitoHorarioError as e:
+                return {"erro": str(e)}
             
             return {
                 "sucesso": True,
@@ -100,6 +105,132 @@ class AgendamentoService:
         except Exception as e:
             return {"erro": f"Erro interno: {str(e)}"}
     
+    @staticmethod
+    def importar_agendamentos(itens: List[Dict]) -> Dict:
+        """Importa agendamentos em lote, retornando o resultado de cada item"""
+        
+        try:
+            resultados = [None] * len(itens)
+            solicitacoes = []
+            
+            # Converte e valida cada item isoladamente
+            for indice, item in enumerate(itens):
+                if not isinstance(item, dict):
+                    resultados[indice] = {"indice": indice, "erro": "Item inválido"}
+                    continue
+                
+                try:
+                    dt_atendimento = datetime.fromisoformat(item.get('dt_atendimento'))
+                except (ValueError, TypeError):
+                    resultados[indice] = {"indice": indice, "erro": "Formato de data/hora inválido"}
+                    continue
+                
+                erro = AgendamentoService._validar_solicitacao(
+                    dt_atendimento, item.get('id_user'), item.get('id_profissional'),
+                    item.get('servicos_ids'))
+                if erro:
+                    resultados[indice] = {"indice": indice, "erro": erro}
+                    continue
+                
+                solicitacoes.append((indice, dt_atendimento, item))
+            
+            # Confere usuários, profissionais e serviços com uma consulta por tabela
+            ids_usuarios = {item['id_user'] for _, _, item in solicitacoes}
+            ids_profissionais = {item['id_profissional'] for _, _, item in solicitacoes}
+            usuarios = {u_id for (u_id,) in db.session.query(UsuarioModel.id).filter(
+                UsuarioModel.id.in_(ids_usuarios))} if ids_usuarios else set()
+            profissionais = {p_id for (p_id,) in db.session.query(ProfissionalModel.id).filter(
+                ProfissionalModel.id.in_(ids_profissionais))} if ids_profissionais else set()
+            servicos_catalogo = catalogo_servicos.obter_varios(
+                {s_id for _, _, item in solicitacoes for s_id in item['servicos_ids']})
+            
+            validos = []
+            for indice, dt_atendimento, item in solicitacoes:
+                if item['id_user'] not in usuarios:
+                    resultados[indice] = {"indice": indice, "erro": "Usuário não encontrado"}
+                elif item['id_profissional'] not in profissionais:
+                    resultados[indice] = {"indice": indice, "erro": "Profissional não encontrado"}
+                else:
+                    faltantes = [s_id for s_id in item['servicos_ids'] if s_id not in servicos_catalogo]
+                    if faltantes:
+                        resultados[indice] = {
+                            "indice": indice,
+                            "erro": f"Serviço com ID {faltantes[0]} não encontrado"
+                        }
+                    else:
+                        validos.append((indice, dt_atendimento, item))
+            
+            # Agenda já gravada dos profissionais envolvidos, lida em uma única consulta
+            # e usada como índice local para detectar conflitos dentro do próprio lote
+            ocupados = {}
+            if validos:
+                existentes = AgendamentoModel.find_by_profissionais_periodo(
+                    list({item['id_profissional'] for _, _, item in validos}),
+                    min(dt for _, dt, _ in validos).date(),
+                    max(dt for _, dt, _ in validos).date() + timedelta(days=1)
+                )
+                for agendamento in existentes:
+                    chave = (agendamento.id_profissional, agendamento.dt_atendimento.date())
+                    ocupados.setdefault(chave, []).append(
+                        (agendamento.dt_atendimento, agendamento.dt_fim, agendamento.id))
+            indice_lote = IndiceAgenda(carregador=lambda p_id, data: ocupados.get((p_id, data), []),
+                                       reconferir_conflitos=False)
+            
+            aceitos = []
+            for indice, dt_atendimento, item in validos:
+                agendamentos = AgendamentoService._montar_agendamentos(
+                    dt_atendimento, item['id_user'], item['id_profissional'],
+                    [servicos_catalogo[s_id] for s_id in item['servicos_ids']],
+                    item.get('observacoes'))
+                dt_fim = agendamentos[-1].dt_fim
+                
+                if not indice_lote.esta_livre(item['id_profissional'], dt_atendimento, dt_fim):
+                    resultados[indice] = {"indice": indice,
+                                          "erro": "Horário não disponível para o profissional"}
+                    continue
+                
+                # Itens ainda sem id recebem um id provisório negativo no índice do lote
+                indice_lote.adicionar(item['id_profissional'], -(indice + 1), dt_atendimento, dt_fim)
+                aceitos.append((indice, agendamentos))
+            
+            # Grava em blocos; se um bloco esbarrar em gravação concorrente, grava item a item
+            for inicio in range(0, len(aceitos), AgendamentoService.LOTE_IMPORTACAO):
+                bloco = aceitos[inicio:inicio + AgendamentoService.LOTE_IMPORTACAO]
+                try:
+                    AgendamentoModel.salvar_varios([ag for _, ags in bloco for ag in ags])
+                    gravados = bloco
+                except ConflitoHorarioError:
+                    gravados = []
+                    for indice, agendamentos in bloco:
+                        try:
+                            AgendamentoModel.salvar_varios(agendamentos)
+                            gravados.append((indice, agendamentos))
+                        except ConflitoHorarioError as e:
+                            resultados[indice] = {"indice": indice, "erro": str(e)}
+                except Exception as e:
+                    gravados = []
+                    for indice, _ in bloco:
+                        resultados[indice] = {"indice": indice, "erro": str(e)}
+                
+                for indice, agendamentos in gravados:
+                    resultados[indice] = {
+                        "indice": indice,
+                        "sucesso": True,
+                        "agendamentos_ids": [ag.id for ag in agendamentos]
+                    }
+            
+            importados = sum(1 for r in resultados if r.get("sucesso"))
+            return {
+                "sucesso": True,
+                "total": len(itens),
+                "importados": importados,
+                "falhas": len(itens) - importados,
+                "resultados": resultados
+            }
+            
+        except Exception as e:
+            return {"erro": f"Erro interno: {str(e)}"}
+    
     @staticmethod
     def cancelar_agendamento(agendamento_id: int, user_id: int) -> Dict:
         """Cancela um agendamento"""
@@ -120,7 +251,7 @@ class AgendamentoService:
                 return {"erro": "Não é possível cancelar um agendamento finalizado"}
             
             # Calcula taxa de cancelamento
-            servico = ServicoModel.query.get(agendamento.id_servico)
+            servico = catalogo_servicos.obter(agendamento.id_servico)
             taxa = 0.0
             
             if not agendamento.pode_cancelar_gratuito():
@@ -148,48 +279,100 @@ class AgendamentoService:
             if not profissional:
                 return {"erro": "Profissional não encontrado"}
             
-            agendamentos = AgendamentoModel.find_by_profissional_data(profissional_id, data)
+            # A grade só é recalculada quando o dia não está no cache
+            horarios_disponiveis = cache_disponibilidade.obter(
+                profissional_id, data,
+                lambda: AgendamentoService._calcular_horarios_livres(
+                    data, AgendamentoModel.find_by_profissional_data(profissional_id, data))
+            )
             
-            horarios_disponiveis = []
-            horarios_ocupados = set()
+            return {
+                "sucesso": True,
+                "data": data.isoformat(),
+                "horarios_disponiveis": horarios_disponiveis
+            }
             
-            # Marca horários ocupados
-            for agendamento in agendamentos:
-                servico = ServicoModel.query.get(agendamento.id_servico)
-                duracao = servico.horario_duracao if servico.horario_duracao else 60
-                
-                inicio = agendamento.dt_atendimento
-                fim = inicio + timedelta(minutes=duracao)
-                
-                slot_atual = inicio
-                while slot_atual < fim:
-                    horarios_ocupados.add(slot_atual.strftime("%H:%M"))
-                    slot_atual += timedelta(minutes=30)
-            
-            # Gera horários disponíveis
-            data_completa = datetime.combine(data, time(AgendamentoService.HORA_ABERTURA))
-            
-            while data_completa.hour < AgendamentoService.HORA_FECHAMENTO:
-                # Pula horário de almoço
-                if (data_completa.hour >= AgendamentoService.HORA_ALMOCO_INICIO and 
-                    data_completa.hour < AgendamentoService.HORA_ALMOCO_FIM):
-                    data_completa += timedelta(minutes=30)
-                    continue
+        except Exception as e:
+            return {"erro": f"Erro interno: {str(e)}"}
+    
+    @staticmethod
+    def listar_horarios_disponiveis_lote(profissionais_ids: List[int], data_inicio: datetime.date,
+                                         data_fim: datetime.date) -> Dict:
+        """Lista horários disponíveis de vários profissionais em um período"""
+        
+        try:
+            if not profissionais_ids:
+                return {"erro": "Informe ao menos um profissional"}
+            
+            if data_fim < data_inicio:
+                return {"erro": "data_fim deve ser maior ou igual a data_inicio"}
+            
+            total_dias = (data_fim - data_inicio).days + 1
+            if total_dias > AgendamentoService.LIMITE_DIAS_LOTE:
+                return {"erro": f"Período máximo de {AgendamentoService.LIMITE_DIAS_LOTE} dias"}
+            
+            profissionais_ids = list(dict.fromkeys(profissionais_ids))
+            profissionais = ProfissionalModel.query.filter(
+                ProfissionalModel.id.in_(profissionais_ids)
+            ).all()
+            encontrados = {p.id: p for p in profissionais}
+            
+            nao_encontrados = [p_id for p_id in profissionais_ids if p_id not in encontrados]
+            if nao_encontrados:
+                return {"erro": f"Profissionais não encontrados: {nao_encontrados}"}
+            
+            dias = [data_inicio + timedelta(days=i) for i in range(total_dias)]
+            
+            # Aproveita as grades em cache e recalcula só os pares que faltam
+            geracao = cache_disponibilidade.geracao
+            grades = {}
+            faltantes = []
+            for p_id in profissionais_ids:
+                for dia in dias:
+                    horarios = cache_disponibilidade.consultar(p_id, dia)
+                    if horarios is None:
+                        faltantes.append((p_id, dia))
+                    else:
+                        grades[(p_id, dia)] = horarios
+            
+            if faltantes:
+                # Agendamentos dos pares faltantes em uma única consulta, agrupados por (profissional, dia)
+                inicio = time.perf_counter()
+                agendamentos = AgendamentoModel.find_by_profissionais_periodo(
+                    list({p_id for p_id, _ in faltantes}), data_inicio, data_fim)
                 
-                horario_str = data_completa.strftime("%H:%M")
+                por_dia = {}
+                for agendamento in agendamentos:
+                    chave = (agendamento.id_profissional, agendamento.dt_atendimento.date())
+                    por_dia.setdefault(chave, []).append(agendamento)
                 
-                if horario_str not in horarios_ocupados:
-                    horarios_disponiveis.append({
-                        "horario": horario_str,
-                        "timestamp": data_completa.isoformat()
-                    })
+                for p_id, dia in faltantes:
+                    grades[(p_id, dia)] = AgendamentoService._calcular_horarios_livres(
+                        dia, por_dia.get((p_id, dia), []))
                 
-                data_completa += timedelta(minutes=30)
+                duracao = (time.perf_counter() - inicio) / len(faltantes)
+                for p_id, dia in faltantes:
+                    cache_disponibilidade.registrar(p_id, dia, grades[(p_id, dia)], geracao, duracao)
+            
+            resultado = []
+            for p_id in profissionais_ids:
+                resultado.append({
+                    "id": p_id,
+                    "nome": encontrados[p_id].nome,
+                    "dias": [
+                        {
+                            "data": dia.isoformat(),
+                            "horarios_disponiveis": grades[(p_id, dia)]
+                        }
+                        for dia in dias
+                    ]
+                })
             
             return {
                 "sucesso": True,
-                "data": data.isoformat(),
-                "horarios_disponiveis": horarios_disponiveis
+                "data_inicio": data_inicio.isoformat(),
+                "data_fim": data_fim.isoformat(),
+                "profissionais": resultado
             }
             
         except Exception as e:
@@ -199,28 +382,37 @@ class AgendamentoService:
     def listar_agendamentos_usuario(user_id: int, 
                                    status: str = None,
                                    data_inicio: datetime = None,
-                                   data_fim: datetime = None) -> Dict:
-        """Lista agendamentos de um usuário"""
+                                   data_fim: datetime = None,
+                                   limite: int = None,
+                                   cursor: str = None) -> Dict:
+        """Lista agendamentos de um usuário, paginados por cursor"""
         
         try:
-            agendamentos = AgendamentoModel.find_by_user(user_id)
+            # Filtros, ordenação e dados de serviço/profissional em uma única consulta
+            query = AgendamentoModel.query.options(
+                joinedload(AgendamentoModel.servico),
+                joinedload(AgendamentoModel.profissional)
+            ).filter(AgendamentoModel.id_user == user_id)
             
             if status:
-                agendamentos = [ag for ag in agendamentos if ag.status == status]
+                query = query.filter(AgendamentoModel.status == status)
             
             if data_inicio:
-                agendamentos = [ag for ag in agendamentos 
-                               if ag.dt_atendimento >= data_inicio]
+                query = query.filter(AgendamentoModel.dt_atendimento >= data_inicio)
             
             if data_fim:
-                agendamentos = [ag for ag in agendamentos 
-                               if ag.dt_atendimento <= data_fim]
+                query = query.filter(AgendamentoModel.dt_atendimento <= data_fim)
+            
+            try:
+                agendamentos, proximo_cursor = AgendamentoModel.paginar(query, limite, cursor)
+            except ValueError as e:
+                return {"erro": str(e)}
             
             agendamentos_detalhados = []
             for agendamento in agendamentos:
                 ag_dict = agendamento.to_dict()
                 
-                servico = ServicoModel.query.get(agendamento.id_servico)
+                servico = agendamento.servico
                 if servico:
                     ag_dict['servico'] = {
                         'descricao': servico.descricao,
@@ -228,7 +420,7 @@ class AgendamentoService:
                         'duracao': servico.horario_duracao
                     }
                 
-                profissional = ProfissionalModel.query.get(agendamento.id_profissional)
+                profissional = agendamento.profissional
                 if profissional:
                     ag_dict['profissional'] = {
                         'nome': profissional.nome
@@ -238,12 +430,59 @@ class AgendamentoService:
             
             return {
                 "sucesso": True,
-                "agendamentos": agendamentos_detalhados
+                "agendamentos": agendamentos_detalhados,
+                "next_cursor": proximo_cursor
             }
             
         except Exception as e:
             return {"erro": f"Erro interno: {str(e)}"}
     
+    @staticmethod
+    def _validar_solicitacao(dt_atendimento: datetime, id_user: int,
+                            id_profissional: int, servicos_ids: List[int]):
+        """Valida os dados de uma solicitação e retorna a mensagem de erro, se houver"""
+        
+        if not AgendamentoService._validar_dados_basicos(
+            dt_atendimento, id_user, id_profissional, servicos_ids):
+            return "Dados inválidos fornecidos"
+        
+        # Não permite agendar para data/hora passadas
+        if dt_atendimento <= datetime.utcnow():
+            return "Não é possível agendar para datas passadas"
+        
+        # Verifica se horário está dentro do funcionamento
+        if not AgendamentoService._verificar_horario_funcionamento(dt_atendimento):
+            return "Horário fora do funcionamento do estabelecimento"
+        
+        return None
+    
+    @staticmethod
+    def _montar_agendamentos(dt_atendimento: datetime, id_user: int, id_profissional: int,
+                            servicos: List, observacoes: str = None) -> List[AgendamentoModel]:
+        """Monta um agendamento por serviço, em sequência a partir de dt_atendimento"""
+        
+        agendamentos = []
+        dt_atual = dt_atendimento
+        
+        for i, servico in enumerate(servicos):
+            duracao_servico = servico.horario_duracao if servico.horario_duracao else 60
+            
+            dt_proximo = dt_atual + timedelta(minutes=duracao_servico)
+            
+            agendamento = AgendamentoModel()
+            agendamento.dt_atendimento = dt_atual
+            agendamento.dt_fim = dt_proximo
+            agendamento.id_user = id_user
+            agendamento.id_profissional = id_profissional
+            agendamento.id_servico = servico.id
+            agendamento.observacoes = observacoes if i == 0 else None
+            agendamento.valor_total = float(servico.valor)
+            
+            agendamentos.append(agendamento)
+            dt_atual = dt_proximo
+        
+        return agendamentos
+    
     @staticmethod
     def _validar_dados_basicos(dt_atendimento: datetime, id_user: int,
                               id_profissional: int, servicos_ids: List[int]) -> bool:
@@ -261,8 +500,25 @@ class AgendamentoService:
         if not servicos_ids or not isinstance(servicos_ids, list):
             return False
         
+        if not all(isinstance(servico_id, int) for servico_id in servicos_ids):
+            return False
+        
         return True
     
+    @staticmethod
+    def _calcular_horarios_livres(data, agendamentos) -> List[Dict]:
+        """Monta a grade do dia e retorna os horários livres"""
+        
+        grade = obter_grade(AgendamentoService.HORA_ABERTURA, AgendamentoService.HORA_FECHAMENTO,
+                            AgendamentoService.HORA_ALMOCO_INICIO, AgendamentoService.HORA_ALMOCO_FIM)
+        
+        # Marca como ocupados os slots que cada agendamento toca
+        ocupados = 0
+        for agendamento in agendamentos:
+            ocupados = grade.ocupar(ocupados, data, agendamento.dt_atendimento, agendamento.dt_fim)
+        
+        return grade.horarios_livres(data, ocupados)
+    
     @staticmethod
     def _verificar_horario_funcionamento(dt_atendimento: datetime) -> bool:
         """Verifica horário de funcionamento"""
@@ -280,21 +536,9 @@ class AgendamentoService:
     
     @staticmethod
     def _verificar_disponibilidade(profissional_id: int, dt_inicio: datetime,
-                                  dt_fim: datetime) -> bool:
+                                  dt_fim: datetime, ignorar_id: int = None) -> bool:
         """Verifica disponibilidade do profissional"""
         
-        agendamentos_conflito = AgendamentoModel.query.filter(
-            AgendamentoModel.id_profissional == profissional_id,
-            AgendamentoModel.status != 'cancelado',
-            AgendamentoModel.dt_atendimento < dt_fim
-        ).all()
-        
-        for agendamento in agendamentos_conflito:
-            servico = ServicoModel.query.get(agendamento.id_servico)
-            duracao = servico.horario_duracao if servico.horario_duracao else 60
-            ag_fim = agendamento.dt_atendimento + timedelta(minutes=duracao)
-            
-            if not (dt_fim <= agendamento.dt_atendimento or dt_inicio >= ag_fim):
-                return False
-        
-        return True
\ No newline at end of file
+        # Consulta o índice de intervalos ocupados do(s) dia(s) do período (um conflito
+        # é reconferido no banco); ignorar_id permite remarcar sem conflitar consigo mesmo
+        return indice_agenda.esta_livre(profissional_id, dt_inicio, dt_fim, ignorar_id)
\ No newline at end of file
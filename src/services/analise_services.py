@@ -0,0 +1,115 @@
+# Análises de receita e cancelamentos por profissional
+# As consultas agregam os totais diários de tb_estatistica_profissional (um registro
+# por profissional/dia/status), então o custo depende do tamanho do período e não da
+# quantidade de agendamentos gravados
+
+from datetime import date, timedelta
+from typing import Dict, List
+from sqlalchemy import case, func
+from ..models.estatistica_profissional_model import EstatisticaProfissionalModel
+from ..models.profissional_model import ProfissionalModel
+from src import db
+
+
+def _filtrar(query, data_inicio: date, data_fim: date, profissionais_ids: List[int] = None):
+    """Aplica período e, se informados, os profissionais"""
+    estatistica = EstatisticaProfissionalModel
+
+    query = query.filter(estatistica.data.between(data_inicio, data_fim))
+    if profissionais_ids:
+        query = query.filter(estatistica.id_profissional.in_(profissionais_ids))
+    return query
+
+
+def receita_semanal(data_inicio: date, data_fim: date, profissionais_ids: List[int] = None) -> Dict:
+    """Receita, agendamentos e taxas de cancelamento por profissional e por semana (ISO)"""
+    estatistica = EstatisticaProfissionalModel
+    ativo = estatistica.status != 'cancelado'
+
+    # Soma por profissional e dia no banco; a virada para semana é feita aqui,
+    # sem depender das funções de data de cada banco
+    query = db.session.query(
+        estatistica.id_profissional,
+        ProfissionalModel.nome,
+        estatistica.data,
+        func.sum(case((ativo, estatistica.receita), else_=0)),
+        func.sum(case((ativo, estatistica.quantidade), else_=0)),
+        func.sum(estatistica.taxas_cancelamento)
+    ).join(ProfissionalModel, ProfissionalModel.id == estatistica.id_profissional)
+
+    linhas = _filtrar(query, data_inicio, data_fim, profissionais_ids).group_by(
+        estatistica.id_profissional, ProfissionalModel.nome, estatistica.data
+    ).all()
+
+    semanas = {}
+    for profissional_id, nome, data, receita, quantidade, taxas in linhas:
+        inicio_semana = data - timedelta(days=data.weekday())
+        item = semanas.setdefault((profissional_id, inicio_semana), {
+            "profissional_id": profissional_id,
+            "profissional_nome": nome,
+            "semana": "%d-W%02d" % inicio_semana.isocalendar()[:2],
+            "inicio_semana": inicio_semana.isoformat(),
+            "agendamentos": 0,
+            "receita": 0.0,
+            "taxas_cancelamento": 0.0
+        })
+        item["agendamentos"] += int(quantidade or 0)
+        item["receita"] += float(receita or 0)
+        item["taxas_cancelamento"] += float(taxas or 0)
+
+    resultado = [semanas[chave] for chave in sorted(semanas)]
+    for item in resultado:
+        item["receita"] = round(item["receita"], 2)
+        item["taxas_cancelamento"] = round(item["taxas_cancelamento"], 2)
+
+    return {
+        "data_inicio": data_inicio.isoformat(),
+        "data_fim": data_fim.isoformat(),
+        "semanas": resultado,
+        "receita_total": round(sum(item["receita"] for item in resultado), 2),
+        "taxas_cancelamento_total": round(sum(item["taxas_cancelamento"] for item in resultado), 2)
+    }
+
+
+def cancelamentos(data_inicio: date, data_fim: date, profissionais_ids: List[int] = None) -> Dict:
+    """Agendamentos, cancelamentos, índice de cancelamento e taxas cobradas por profissional"""
+    estatistica = EstatisticaProfissionalModel
+    cancelado = estatistica.status == 'cancelado'
+
+    query = db.session.query(
+        estatistica.id_profissional,
+        ProfissionalModel.nome,
+        func.sum(estatistica.quantidade),
+        func.sum(case((cancelado, estatistica.quantidade), else_=0)),
+        func.sum(estatistica.taxas_cancelamento)
+    ).join(ProfissionalModel, ProfissionalModel.id == estatistica.id_profissional)
+
+    linhas = _filtrar(query, data_inicio, data_fim, profissionais_ids).group_by(
+        estatistica.id_profissional, ProfissionalModel.nome
+    ).order_by(estatistica.id_profissional).all()
+
+    profissionais = []
+    for profissional_id, nome, total, cancelados, taxas in linhas:
+        total = int(total or 0)
+        cancelados = int(cancelados or 0)
+        profissionais.append({
+            "profissional_id": profissional_id,
+            "profissional_nome": nome,
+            "agendamentos": total,
+            "cancelados": cancelados,
+            "indice_cancelamento": cancelados / total if total else 0.0,
+            "taxas_cancelamento": round(float(taxas or 0), 2)
+        })
+
+    total = sum(item["agendamentos"] for item in profissionais)
+    cancelados = sum(item["cancelados"] for item in profissionais)
+
+    return {
+        "data_inicio": data_inicio.isoformat(),
+        "data_fim": data_fim.isoformat(),
+        "profissionais": profissionais,
+        "agendamentos": total,
+        "cancelados": cancelados,
+        "indice_cancelamento": cancelados / total if total else 0.0,
+        "taxas_cancelamento": round(sum(item["taxas_cancelamento"] for item in profissionais), 2)
+    }
@@ -0,0 +1,132 @@
+# Registro assíncrono dos logins em tb_login
+# O login só enfileira o evento; uma thread de fundo grava os eventos em lotes (por
+# quantidade ou por tempo), então a requisição de login não espera um commit e, no
+# SQLite, não disputa a escrita com os agendamentos a cada login
+
+import atexit
+import queue
+import threading
+import time
+from typing import Dict, List
+
+
+class AuditoriaLogin:
+    """Fila limitada de eventos de login gravados em lote por uma thread de fundo"""
+
+    # Eventos aguardando gravação; cheia, o login espera um pouco e depois descarta
+    CAPACIDADE = 10000
+    ESPERA_FILA_CHEIA = 0.05
+    # Gravação a cada LOTE eventos ou INTERVALO_SEGUNDOS, o que vier primeiro
+    LOTE = 200
+    INTERVALO_SEGUNDOS = 1.0
+
+    def __init__(self, capacidade: int = None):
+        self._fila = queue.Queue(maxsize=capacidade or self.CAPACIDADE)
+        self._app = None
+        self._thread = None
+        self._parar = threading.Event()
+        self._lock = threading.Lock()
+        self.enfileirados = 0
+        self.gravados = 0
+        self.descartados = 0
+        self.falhas_gravacao = 0
+
+    def registrar(self, email: str):
+        """Enfileira um login; se a fila continuar cheia, o evento é descartado e contado"""
+
+        self._iniciar()
+        try:
+            self._fila.put({"email": email, "senha": ""}, timeout=self.ESPERA_FILA_CHEIA)
+            with self._lock:
+                self.enfileirados += 1
+        except queue.Full:
+            with self._lock:
+                self.descartados += 1
+
+    def _iniciar(self):
+        """Sobe a thread de gravação no primeiro evento, presa à aplicação atual"""
+
+        if self._thread is not None:
+            return
+
+        with self._lock:
+            if self._thread is not None:
+                return
+            from flask import current_app
+            self._app = current_app._get_current_object()
+            self._thread = threading.Thread(target=self._executar, name='auditoria-login',
+                                            daemon=True)
+            self._thread.start()
+            atexit.register(self.encerrar)
+
+    def _executar(self):
+        lote = []
+        limite = time.monotonic() + self.INTERVALO_SEGUNDOS
+
+        while not self._parar.is_set():
+            try:
+                lote.append(self._fila.get(timeout=max(0.0, limite - time.monotonic())))
+            except queue.Empty:
+                pass
+
+            if len(lote) >= self.LOTE or time.monotonic() >= limite:
+                if lote:
+                    self._gravar(lote)
+                    lote = []
+                limite = time.monotonic() + self.INTERVALO_SEGUNDOS
+
+        # Encerramento: grava o que sobrou no lote e na fila
+        lote.extend(self._esvaziar_fila())
+        if lote:
+            self._gravar(lote)
+
+    def _esvaziar_fila(self) -> List[Dict]:
+        eventos = []
+        while True:
+            try:
+                eventos.append(self._fila.get_nowait())
+            except queue.Empty:
+                return eventos
+
+    def _gravar(self, lote: List[Dict]):
+        """Insere o lote em uma única transação"""
+
+        from ..models.login_model import LoginModel
+        from ..models.escrita import escrita_serializada
+        from src import db
+
+        with self._app.app_context():
+            try:
+                with escrita_serializada():
+                    db.session.execute(LoginModel.__table__.insert(), lote)
+                    db.session.commit()
+                self.gravados += len(lote)
+            except Exception as e:
+                db.session.rollback()
+                self.falhas_gravacao += len(lote)
+                print(f'Erro ao gravar auditoria de login: {e}')
+            finally:
+                db.session.remove()
+
+    def encerrar(self, timeout: float = 5.0):
+        """Para a thread depois de gravar os eventos pendentes (chamado na saída do processo)"""
+
+        if self._thread is None:
+            return
+        self._parar.set()
+        self._thread.join(timeout)
+
+    def metricas(self) -> Dict:
+        """Eventos gravados, pendentes e perdidos"""
+
+        return {
+            "enfileirados": self.enfileirados,
+            "gravados": self.gravados,
+            "pendentes": self._fila.qsize(),
+            "descartados": self.descartados,
+            "falhas_gravacao": self.falhas_gravacao
+        }
+
+
+# Instância compartilhada pelo processo
+auditoria_login = AuditoriaLogin()
@@ -0,0 +1,122 @@
+# Cache dos horários disponíveis já calculados por (profissional, dia)
+# A disponibilidade é lida muito mais do que muda, então a grade de cada dia fica
+# guardada até um agendamento ser criado, cancelado ou remarcado naquele dia
+
+import time
+from collections import OrderedDict
+from datetime import date, datetime, timedelta
+from threading import RLock
+from typing import Callable, Dict, List
+
+
+class CacheDisponibilidade:
+    """Cache LRU de horários disponíveis por profissional e por dia"""
+
+    # Quantidade máxima de dias mantidos em memória
+    CAPACIDADE = 4096
+    # Tempo máximo de uma entrada, para enxergar agendamentos feitos por outros processos
+    TTL_SEGUNDOS = 60
+
+    def __init__(self, capacidade: int = None):
+        self.capacidade = capacidade or self.CAPACIDADE
+        self._entradas = OrderedDict()
+        self._lock = RLock()
+        # Incrementada a cada invalidação; descarta reconstruções que ficaram velhas
+        self._geracao = 0
+        self.acertos = 0
+        self.falhas = 0
+        self.reconstrucoes = 0
+        self.tempo_reconstrucao_total = 0.0
+        self.tempo_reconstrucao_max = 0.0
+
+    def consultar(self, profissional_id: int, data: date):
+        """Retorna os horários guardados ou None, contabilizando acerto/falha"""
+
+        chave = (profissional_id, data)
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is not None and time.monotonic() - entrada[1] <= self.TTL_SEGUNDOS:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return entrada[0]
+
+            if entrada is not None:
+                del self._entradas[chave]
+            self.falhas += 1
+            return None
+
+    def obter(self, profissional_id: int, data: date, construir: Callable[[], List]) -> List:
+        """Retorna os horários do dia, construindo e guardando em caso de falha"""
+
+        horarios = self.consultar(profissional_id, data)
+        if horarios is not None:
+            return horarios
+
+        geracao = self._geracao
+        inicio = time.perf_counter()
+        horarios = construir()
+        self.registrar(profissional_id, data, horarios, geracao, time.perf_counter() - inicio)
+        return horarios
+
+    def registrar(self, profissional_id: int, data: date, horarios: List,
+                  geracao: int, duracao: float = 0.0):
+        """Guarda uma grade reconstruída, se nada foi invalidado desde o início da construção"""
+
+        with self._lock:
+            self.reconstrucoes += 1
+            self.tempo_reconstrucao_total += duracao
+            self.tempo_reconstrucao_max = max(self.tempo_reconstrucao_max, duracao)
+
+            if geracao != self._geracao:
+                return
+
+            self._entradas[(profissional_id, data)] = (horarios, time.monotonic())
+            self._entradas.move_to_end((profissional_id, data))
+            while len(self._entradas) > self.capacidade:
+                self._entradas.popitem(last=False)
+
+    @property
+    def geracao(self) -> int:
+        return self._geracao
+
+    def invalidar(self, profissional_id: int, data: date):
+        """Descarta a grade de um profissional em um dia"""
+
+        with self._lock:
+            self._geracao += 1
+            self._entradas.pop((profissional_id, data), None)
+
+    def invalidar_periodo(self, profissional_id: int, dt_inicio: datetime, dt_fim: datetime = None):
+        """Descarta as grades dos dias tocados pelo período [dt_inicio, dt_fim)"""
+
+        dia = dt_inicio.date()
+        ultimo = (dt_fim - timedelta(microseconds=1)).date() if dt_fim and dt_fim > dt_inicio else dia
+        while dia <= ultimo:
+            self.invalidar(profissional_id, dia)
+            dia += timedelta(days=1)
+
+    def limpar(self):
+        with self._lock:
+            self._geracao += 1
+            self._entradas.clear()
+
+    def metricas(self) -> Dict:
+        """Taxa de acerto e tempo de reconstrução das grades"""
+
+        total = self.acertos + self.falhas
+        return {
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "taxa_acerto": self.acertos / total if total else 0.0,
+            "entradas": len(self._entradas),
+            "capacidade": self.capacidade,
+            "reconstrucoes": self.reconstrucoes,
+            "tempo_reconstrucao_medio_ms": (
+                self.tempo_reconstrucao_total / self.reconstrucoes * 1000 if self.reconstrucoes else 0.0
+            ),
+            "tempo_reconstrucao_max_ms": self.tempo_reconstrucao_max * 1000
+        }
+
+
+# Instância compartilhada pelo processo
+cache_disponibilidade = CacheDisponibilidade()
@@ -0,0 +1,76 @@
+# Cache dos tokens JWT já verificados
+# Clientes que consultam a API com frequência reenviam sempre o mesmo token; guardar
+# as claims de um token já conferido evita refazer o HMAC e o parse a cada requisição
+
+import time
+from collections import OrderedDict
+from threading import RLock
+from typing import Dict, Optional
+
+
+class CacheTokens:
+    """Cache LRU com TTL das claims de tokens com assinatura válida"""
+
+    # Quantidade máxima de tokens mantidos em memória
+    CAPACIDADE = 10000
+    # Tempo máximo de uma entrada, mesmo que o token expire depois
+    TTL_SEGUNDOS = 300
+
+    def __init__(self, capacidade: int = None):
+        self.capacidade = capacidade or self.CAPACIDADE
+        self._entradas = OrderedDict()
+        self._lock = RLock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def obter(self, token: str) -> Optional[Dict]:
+        """Retorna as claims do token se ele foi verificado há pouco e não expirou"""
+
+        with self._lock:
+            entrada = self._entradas.get(token)
+            if entrada is not None and time.time() < entrada[1]:
+                self._entradas.move_to_end(token)
+                self.acertos += 1
+                return entrada[0]
+
+            if entrada is not None:
+                del self._entradas[token]
+            self.falhas += 1
+            return None
+
+    def registrar(self, token: str, payload: Dict):
+        """Guarda as claims até o menor entre o TTL e o exp do token"""
+
+        validade = time.time() + self.TTL_SEGUNDOS
+        if 'exp' in payload:
+            validade = min(validade, float(payload['exp']))
+
+        with self._lock:
+            self._entradas[token] = (payload, validade)
+            self._entradas.move_to_end(token)
+            while len(self._entradas) > self.capacidade:
+                self._entradas.popitem(last=False)
+
+    def remover(self, token: str):
+        with self._lock:
+            self._entradas.pop(token, None)
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def metricas(self) -> Dict:
+        """Contadores de acerto/falha do cache"""
+
+        total = self.acertos + self.falhas
+        return {
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "taxa_acerto": self.acertos / total if total else 0.0,
+            "entradas": len(self._entradas),
+            "capacidade": self.capacidade
+        }
+
+
+# Instância compartilhada pelo processo
+cache_tokens = CacheTokens()
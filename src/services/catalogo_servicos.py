@@ -0,0 +1,82 @@
+# Cache em memória do catálogo de serviços (tb_servico)
+# O catálogo é pequeno e muda pouco, então é lido inteiro de uma vez e mantido
+# no processo até ser invalidado por cadastro/edição/exclusão de serviço
+
+import time
+from collections import namedtuple
+from threading import RLock
+from typing import Dict, Iterable, Optional
+
+
+# Cópia somente leitura de um serviço, desacoplada da sessão do SQLAlchemy
+ServicoCatalogo = namedtuple('ServicoCatalogo', ['id', 'descricao', 'valor', 'horario_duracao'])
+
+
+class CatalogoServicos:
+    """Cache do catálogo de serviços indexado pelo id"""
+
+    # Tempo máximo sem recarregar, para enxergar alterações feitas por outros processos
+    TTL_SEGUNDOS = 300
+
+    def __init__(self):
+        self._servicos = None
+        self._carregado_em = 0.0
+        self._lock = RLock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def _catalogo(self) -> Dict[int, ServicoCatalogo]:
+        with self._lock:
+            expirado = time.monotonic() - self._carregado_em > self.TTL_SEGUNDOS
+            if self._servicos is None or expirado:
+                self.falhas += 1
+                self._servicos = _carregar_do_banco()
+                self._carregado_em = time.monotonic()
+            else:
+                self.acertos += 1
+            return self._servicos
+
+    def obter(self, servico_id: int) -> Optional[ServicoCatalogo]:
+        """Retorna o serviço do catálogo ou None se não existir"""
+
+        return self._catalogo().get(servico_id)
+
+    def obter_varios(self, servicos_ids: Iterable[int]) -> Dict[int, ServicoCatalogo]:
+        """Retorna os serviços encontrados entre os ids informados"""
+
+        catalogo = self._catalogo()
+        return {servico_id: catalogo[servico_id] for servico_id in servicos_ids
+                if servico_id in catalogo}
+
+    def invalidar(self):
+        """Descarta o catálogo para que seja relido na próxima consulta"""
+
+        with self._lock:
+            self._servicos = None
+
+    def metricas(self) -> Dict:
+        """Contadores de acerto/falha do cache"""
+
+        total = self.acertos + self.falhas
+        return {
+            "acertos": self.acertos,
+            "falhas": self.falhas,
+            "taxa_acerto": self.acertos / total if total else 0.0,
+            "servicos": len(self._servicos) if self._servicos is not None else 0
+        }
+
+
+def _carregar_do_banco() -> Dict[int, ServicoCatalogo]:
+    """Lê todo o catálogo de serviços em uma consulta"""
+
+    from ..models.servicos_model import ServicoModel
+    from src import db
+
+    linhas = db.session.query(
+        ServicoModel.id, ServicoModel.descricao, ServicoModel.valor, ServicoModel.horario_duracao
+    ).all()
+    return {linha.id: ServicoCatalogo(*linha) for linha in linhas}
+
+
+# Instância compartilhada pelo processo
+catalogo_servicos = CatalogoServicos()
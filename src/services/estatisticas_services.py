@@ -0,0 +1,76 @@
+from datetime import date
+from typing import Dict
+from sqlalchemy import case, func
+from ..models.estatistica_profissional_model import EstatisticaProfissionalModel
+from src import db
+
+
+def resumo_profissional(profissional_id: int, hoje: date) -> Dict:
+    """Total de agendamentos e agendamentos ativos de hoje, em uma consulta aos totais diários"""
+    estatistica = EstatisticaProfissionalModel
+
+    total, de_hoje = db.session.query(
+        func.coalesce(func.sum(estatistica.quantidade), 0),
+        func.coalesce(func.sum(case(
+            ((estatistica.data == hoje) & (estatistica.status == 'agendado'), estatistica.quantidade),
+            else_=0
+        )), 0)
+    ).filter(estatistica.id_profissional == profissional_id).one()
+
+    return {"total_agendamentos": int(total), "agendamentos_hoje": int(de_hoje)}
+
+
+def estatisticas_profissional(profissional_id: int, data_inicio: date, data_fim: date) -> Dict:
+    """Agendamentos, receita e taxas de cancelamento do profissional no período, por dia e status"""
+    estatistica = EstatisticaProfissionalModel
+
+    linhas = db.session.query(
+        estatistica.data, estatistica.status, estatistica.quantidade,
+        estatistica.receita, estatistica.taxas_cancelamento
+    ).filter(
+        estatistica.id_profissional == profissional_id,
+        estatistica.data.between(data_inicio, data_fim),
+        estatistica.quantidade != 0
+    ).order_by(estatistica.data, estatistica.status).all()
+
+    por_status = {}
+    por_dia = []
+    receita = 0.0
+    taxas = 0.0
+
+    for linha in linhas:
+        valor = float(linha.receita or 0)
+        taxa = float(linha.taxas_cancelamento or 0)
+
+        status = por_status.setdefault(linha.status, {"quantidade": 0, "receita": 0.0, "taxas_cancelamento": 0.0})
+        status["quantidade"] += linha.quantidade
+        status["receita"] += valor
+        status["taxas_cancelamento"] += taxa
+
+        # Agendamento cancelado não conta como receita, só a taxa cobrada
+        if linha.status != 'cancelado':
+            receita += valor
+        taxas += taxa
+
+        por_dia.append({
+            "data": linha.data.isoformat(),
+            "status": linha.status,
+            "quantidade": linha.quantidade,
+            "receita": valor,
+            "taxas_cancelamento": taxa
+        })
+
+    total = sum(item["quantidade"] for item in por_status.values())
+    cancelados = por_status.get('cancelado', {}).get("quantidade", 0)
+
+    return {
+        "profissional_id": profissional_id,
+        "data_inicio": data_inicio.isoformat(),
+        "data_fim": data_fim.isoformat(),
+        "total_agendamentos": total,
+        "receita": round(receita, 2),
+        "taxas_cancelamento": round(taxas, 2),
+        "indice_cancelamento": cancelados / total if total else 0.0,
+        "por_status": por_status,
+        "por_dia": por_dia
+    }
@@ -0,0 +1,47 @@
+# Exportação de agendamentos em fluxo (NDJSON ou JSON em partes)
+# Os registros são lidos do banco em lotes (yield_per) e serializados um a um, então a
+# memória usada não cresce com o tamanho do histórico e o primeiro byte sai logo
+
+import json
+from flask import Response, stream_with_context
+from ..models.agendamento_model import AgendamentoModel
+
+
+FORMATOS = ('ndjson', 'json')
+
+# Registros buscados por ida ao banco
+TAMANHO_LOTE = 1000
+
+
+def _registros(query):
+    """Percorre a consulta em lotes, em ordem cronológica, liberando cada objeto após o uso"""
+    query = query.order_by(
+        AgendamentoModel.dt_atendimento, AgendamentoModel.id
+    ).yield_per(TAMANHO_LOTE)
+
+    for agendamento in query:
+        registro = agendamento.to_dict()
+        query.session.expunge(agendamento)
+        yield registro
+
+
+def _gerar_ndjson(query):
+    for registro in _registros(query):
+        yield json.dumps(registro) + '\n'
+
+
+def _gerar_json(query):
+    total = 0
+    yield '{"agendamentos": ['
+    for registro in _registros(query):
+        yield (',' if total else '') + json.dumps(registro)
+        total += 1
+    yield '], "total": %d}' % total
+
+
+def resposta_exportacao(query, formato: str) -> Response:
+    """Resposta em fluxo com os agendamentos da consulta no formato pedido"""
+
+    if formato == 'ndjson':
+        return Response(stream_with_context(_gerar_ndjson(query)), mimetype='application/x-ndjson')
+    return Response(stream_with_context(_gerar_json(query)), mimetype='application/json')
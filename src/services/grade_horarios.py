@@ -0,0 +1,79 @@
+# Grade de horários de um dia de trabalho representada como bitmap
+# Cada bit é um slot de 30 minutos a partir da abertura; os agendamentos marcam
+# faixas de bits ocupados e os horários livres são lidos varrendo os bits restantes
+
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import Dict, List
+
+
+class GradeHorarios:
+    """Dia de trabalho como bitmap de slots de tamanho fixo"""
+
+    def __init__(self, hora_abertura: int, hora_fechamento: int,
+                 hora_almoco_inicio: int, hora_almoco_fim: int, minutos_slot: int = 30):
+        self.hora_abertura = hora_abertura
+        self.minutos_slot = minutos_slot
+        self.total_slots = (hora_fechamento - hora_abertura) * 60 // minutos_slot
+
+        # Slots de funcionamento, sem o intervalo de almoço
+        self.mascara_funcionamento = self._faixa(0, self.total_slots) & ~self._faixa(
+            self._indice_hora(hora_almoco_inicio), self._indice_hora(hora_almoco_fim))
+
+        # Rótulos "HH:MM" de cada slot, calculados uma única vez
+        abertura = datetime.combine(date.min, time(hora_abertura))
+        self.rotulos = [
+            (abertura + timedelta(minutes=indice * minutos_slot)).strftime("%H:%M")
+            for indice in range(self.total_slots)
+        ]
+
+    def _indice_hora(self, hora: int) -> int:
+        return max(0, min(self.total_slots, (hora - self.hora_abertura) * 60 // self.minutos_slot))
+
+    @staticmethod
+    def _faixa(inicio: int, fim: int) -> int:
+        """Bits [inicio, fim) ligados"""
+
+        if fim <= inicio:
+            return 0
+        return ((1 << (fim - inicio)) - 1) << inicio
+
+    def ocupar(self, ocupados: int, data: date, dt_inicio: datetime, dt_fim: datetime) -> int:
+        """Marca como ocupados os slots do dia que se sobrepõem a [dt_inicio, dt_fim)"""
+
+        abertura = datetime.combine(data, time(self.hora_abertura))
+        tamanho = self.minutos_slot * 60
+
+        # Primeiro slot tocado (arredonda para baixo) e slot após o fim (arredonda para cima)
+        inicio = int((dt_inicio - abertura).total_seconds() // tamanho)
+        fim = -int(-(dt_fim - abertura).total_seconds() // tamanho)
+
+        inicio = max(0, inicio)
+        fim = min(self.total_slots, fim)
+        return ocupados | self._faixa(inicio, fim)
+
+    def horarios_livres(self, data: date, ocupados: int) -> List[Dict]:
+        """Lista os slots de funcionamento não ocupados, em ordem"""
+
+        prefixo = data.isoformat()
+        livres = self.mascara_funcionamento & ~ocupados
+        horarios = []
+
+        while livres:
+            bit = livres & -livres
+            rotulo = self.rotulos[bit.bit_length() - 1]
+            horarios.append({
+                "horario": rotulo,
+                "timestamp": f"{prefixo}T{rotulo}:00"
+            })
+            livres ^= bit
+
+        return horarios
+
+
+@lru_cache(maxsize=8)
+def obter_grade(hora_abertura: int, hora_fechamento: int,
+                hora_almoco_inicio: int, hora_almoco_fim: int) -> GradeHorarios:
+    """Grade compartilhada para uma configuração de horário de funcionamento"""
+
+    return GradeHorarios(hora_abertura, hora_fechamento, hora_almoco_inicio, hora_almoco_fim)
@@ -0,0 +1,207 @@
+# Índice em memória dos horários ocupados de cada profissional
+# Guarda, por (profissional, dia), os intervalos [inicio, fim) ordenados pelo início,
+# permitindo responder se um período está livre em O(log n) sem varrer o histórico.
+# O índice só acompanha as gravações deste processo: um conflito apontado por ele é
+# conferido relendo o dia do banco, já que outro processo pode ter cancelado ou
+# remarcado o agendamento; um horário dado como livre é conferido pela verificação
+# feita no banco dentro da transação de gravação (AgendamentoModel.salvar_varios)
+
+from bisect import bisect_left
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta
+from threading import RLock
+from typing import Callable, Iterable, Optional, Tuple
+
+
+class _IntervalosDia:
+    """Intervalos ocupados de um profissional em um dia"""
+
+    def __init__(self, intervalos: Iterable[Tuple[datetime, datetime, int]] = ()):
+        # Cada intervalo é (inicio, fim, agendamento_id), ordenado pelo início
+        self.intervalos = sorted(intervalos)
+        # fim_max[i] guarda o maior fim entre intervalos[0..i], o que mantém a
+        # consulta correta mesmo se existirem agendamentos sobrepostos no banco
+        self.fim_max = []
+        self._recalcular_fim_max(0)
+
+    def _recalcular_fim_max(self, posicao: int):
+        del self.fim_max[posicao:]
+        maior = self.fim_max[-1] if self.fim_max else None
+        for _, fim, _ in self.intervalos[posicao:]:
+            maior = fim if maior is None or fim > maior else maior
+            self.fim_max.append(maior)
+
+    def inserir(self, inicio: datetime, fim: datetime, agendamento_id: int):
+        item = (inicio, fim, agendamento_id)
+        posicao = bisect_left(self.intervalos, item)
+        self.intervalos.insert(posicao, item)
+        self._recalcular_fim_max(posicao)
+
+    def remover(self, agendamento_id: int, inicio: datetime):
+        posicao = bisect_left(self.intervalos, (inicio,))
+        while posicao < len(self.intervalos) and self.intervalos[posicao][0] == inicio:
+            if self.intervalos[posicao][2] == agendamento_id:
+                del self.intervalos[posicao]
+                self._recalcular_fim_max(posicao)
+                return
+            posicao += 1
+
+    def sobrepoe(self, inicio: datetime, fim: datetime, ignorar_id: int = None) -> bool:
+        # Último intervalo que começa antes do fim do período consultado
+        posicao = bisect_left(self.intervalos, (fim,)) - 1
+        if posicao < 0 or self.fim_max[posicao] <= inicio:
+            return False
+
+        if ignorar_id is None:
+            return True
+
+        # Ao remarcar, o próprio agendamento não conta como conflito
+        while posicao >= 0 and self.fim_max[posicao] > inicio:
+            ag_inicio, ag_fim, ag_id = self.intervalos[posicao]
+            if ag_id != ignorar_id and ag_fim > inicio:
+                return True
+            posicao -= 1
+        return False
+
+
+class IndiceAgenda:
+    """Índice de intervalos ocupados por profissional e por dia"""
+
+    # Quantidade máxima de dias (profissional, data) mantidos em memória
+    LIMITE_DIAS = 5000
+
+    def __init__(self, carregador: Callable = None, reconferir_conflitos: bool = True):
+        self._dias = OrderedDict()
+        # A trava protege só as estruturas em memória: a leitura do banco é feita fora
+        # dela, para que um dia sendo carregado não segure as consultas aos demais
+        self._lock = RLock()
+        # Dias em carga: chave -> [cargas em andamento, alterações recebidas durante a carga]
+        self._em_carga = {}
+        self._carregador = carregador or _carregar_do_banco
+        # Índices locais (ex.: o da importação em lote) guardam intervalos que não
+        # estão no banco, então não podem reler o dia
+        self._reconferir_conflitos = reconferir_conflitos
+
+    @staticmethod
+    def _dias_do_periodo(dt_inicio: datetime, dt_fim: datetime):
+        """Datas tocadas pelo período [dt_inicio, dt_fim)"""
+
+        dia = dt_inicio.date()
+        ultimo = (dt_fim - timedelta(microseconds=1)).date() if dt_fim > dt_inicio else dia
+        while dia <= ultimo:
+            yield dia
+            dia += timedelta(days=1)
+
+    def _carregar_dia(self, profissional_id: int, data: date) -> _IntervalosDia:
+        """Lê o dia fora da trava; só guarda o resultado se nenhuma gravação chegou no meio"""
+
+        chave = (profissional_id, data)
+        with self._lock:
+            carga = self._em_carga.setdefault(chave, [0, 0])
+            carga[0] += 1
+            alteracoes_antes = carga[1]
+
+        dia = None
+        try:
+            dia = _IntervalosDia(self._carregador(profissional_id, data))
+        finally:
+            with self._lock:
+                carga[0] -= 1
+                if not carga[0]:
+                    del self._em_carga[chave]
+
+                # Um adicionar/remover durante a leitura pode ou não estar no resultado:
+                # nesse caso a resposta é usada, mas o dia não fica guardado
+                if dia is not None and carga[1] == alteracoes_antes:
+                    self._dias[chave] = dia
+                    self._dias.move_to_end(chave)
+                    if len(self._dias) > self.LIMITE_DIAS:
+                        self._dias.popitem(last=False)
+        return dia
+
+    def _registrar_alteracao(self, chave):
+        carga = self._em_carga.get(chave)
+        if carga is not None:
+            carga[1] += 1
+
+    def esta_livre(self, profissional_id: int, dt_inicio: datetime,
+                   dt_fim: datetime, ignorar_id: int = None) -> bool:
+        """Indica se o profissional não tem nada marcado em [dt_inicio, dt_fim)"""
+
+        for data in self._dias_do_periodo(dt_inicio, dt_fim):
+            with self._lock:
+                dia = self._dias.get((profissional_id, data))
+                if dia is not None:
+                    conflito = dia.sobrepoe(dt_inicio, dt_fim, ignorar_id)
+                    if not conflito or not self._reconferir_conflitos:
+                        self._dias.move_to_end((profissional_id, data))
+                        if conflito:
+                            return False
+                        continue
+
+            # Dia ainda não carregado, ou conflito a reconferir: o intervalo em memória
+            # pode ter sido liberado por outro processo
+            if self._carregar_dia(profissional_id, data).sobrepoe(dt_inicio, dt_fim, ignorar_id):
+                return False
+        return True
+
+    def adicionar(self, profissional_id: int, agendamento_id: int,
+                  dt_inicio: datetime, dt_fim: datetime):
+        """Registra um intervalo ocupado nos dias já carregados"""
+
+        with self._lock:
+            for data in self._dias_do_periodo(dt_inicio, dt_fim):
+                self._registrar_alteracao((profissional_id, data))
+                dia = self._dias.get((profissional_id, data))
+                # Dias ainda não carregados vão buscar o intervalo no banco depois
+                if dia is not None:
+                    dia.remover(agendamento_id, dt_inicio)
+                    dia.inserir(dt_inicio, dt_fim, agendamento_id)
+
+    def remover(self, profissional_id: int, agendamento_id: int,
+                dt_inicio: datetime, dt_fim: Optional[datetime] = None):
+        """Libera o intervalo de um agendamento"""
+
+        with self._lock:
+            for data in self._dias_do_periodo(dt_inicio, dt_fim or dt_inicio):
+                self._registrar_alteracao((profissional_id, data))
+                dia = self._dias.get((profissional_id, data))
+                if dia is not None:
+                    dia.remover(agendamento_id, dt_inicio)
+
+    def invalidar(self, profissional_id: int = None, data: date = None):
+        """Descarta dias carregados para que sejam relidos do banco"""
+
+        with self._lock:
+            for chave in list(self._em_carga):
+                if profissional_id is None or (chave[0] == profissional_id and
+                                               (data is None or chave[1] == data)):
+                    self._registrar_alteracao(chave)
+
+            if profissional_id is None:
+                self._dias.clear()
+                return
+
+            for chave in list(self._dias):
+                if chave[0] == profissional_id and (data is None or chave[1] == data):
+                    del self._dias[chave]
+
+
+def _carregar_do_banco(profissional_id: int, data: date):
+    """Lê do banco os intervalos ocupados de um profissional em um dia"""
+
+    from ..models.agendamento_model import AgendamentoModel
+
+    # Uma única consulta de intervalo por dia, usando o fim gravado no agendamento
+    inicio_dia = datetime.combine(data, time.min)
+    fim_dia = inicio_dia + timedelta(days=1)
+
+    return [
+        (agendamento.dt_atendimento, agendamento.dt_fim, agendamento.id)
+        for agendamento in AgendamentoModel.find_conflitos_horario(
+            profissional_id, inicio_dia, fim_dia)
+    ]
+
+
+# Instância compartilhada pelo processo
+indice_agenda = IndiceAgenda()
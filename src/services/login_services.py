@@ -1,9 +1,22 @@
 from ..models.usuario_model import UsuarioModel
-from ..models.login_model import LoginModel
 from src import db
+from .cache_tokens import cache_tokens
+from .revogacao_tokens import revogacao_tokens
+from .auditoria_login import auditoria_login
 import jwt
+import time
+import uuid
+from functools import wraps
 from datetime import datetime, timedelta
-from flask import current_app
+from flask import current_app, g, request, jsonify, make_response
+
+
+# Validade dos tokens de acesso
+VALIDADE_TOKEN = timedelta(hours=24)
+
+
+class TokenRevogadoError(jwt.InvalidTokenError):
+    pass
 
 
 def autenticar_usuario(email, senha):
@@ -19,11 +32,15 @@ def autenticar_usuario(email, senha):
         if not usuario.verificar_senha(senha):
             return {"erro": "Email ou senha incorretos"}
         
-        # Gera token JWT
+        # Gera token JWT; o jti identifica o token para revogação no logout e o iat leva
+        # frações de segundo, para separar tokens emitidos antes e depois de uma troca de senha
+        agora = datetime.utcnow()
         payload = {
             'user_id': usuario.id,
             'email': usuario.email,
-            'exp': datetime.utcnow() + timedelta(hours=24)  # Token válido por 24 horas
+            'jti': uuid.uuid4().hex,
+            'iat': time.time(),
+            'exp': agora + VALIDADE_TOKEN  # Token válido por 24 horas
         }
         
         token = jwt.encode(
@@ -32,10 +49,12 @@ def autenticar_usuario(email, senha):
             algorithm='HS256'
         )
         
-        # Registra o login
-        login_record = LoginModel(email=email, senha="")  # Não armazena senha real
-        db.session.add(login_record)
-        db.session.commit()
+        # Senha refeita com o custo atual durante a verificação é gravada agora
+        if db.session.is_modified(usuario):
+            db.session.commit()
+        
+        # Registra o login em segundo plano (não armazena senha real)
+        auditoria_login.registrar(email)
         
         return {
             "sucesso": True,
@@ -51,26 +70,100 @@ def autenticar_usuario(email, senha):
         return {"erro": f"Erro na autenticação: {str(e)}"}
 
 
-def verificar_token(token):
-    """Verifica se um token JWT é válido"""
-    try:
+def decodificar_token(token):
+    """Retorna as claims do token, reaproveitando a verificação de tokens já vistos"""
+    payload = cache_tokens.obter(token)
+    if payload is None:
         payload = jwt.decode(
             token,
             current_app.config['SECRET_KEY'],
             algorithms=['HS256']
         )
+        cache_tokens.registrar(token, payload)
+
+    # Assinatura válida não basta: o token pode ter sido revogado por logout ou troca de senha
+    if revogacao_tokens.revogado(payload):
+        raise TokenRevogadoError()
+    return payload
+
+
+def verificar_token(token):
+    """Verifica se um token JWT é válido"""
+    try:
+        payload = decodificar_token(token)
         return {"valido": True, "user_id": payload['user_id']}
     except jwt.ExpiredSignatureError:
         return {"valido": False, "erro": "Token expirado"}
-    except jwt.InvalidTokenError:
+    except TokenRevogadoError:
+        return {"valido": False, "erro": "Token revogado"}
+    except (jwt.InvalidTokenError, KeyError):
         return {"valido": False, "erro": "Token inválido"}
 
 
+def autenticar_requisicao():
+    """Lê o token Bearer do cabeçalho e coloca o usuário autenticado em flask.g"""
+    g.user_id = None
+    # Motivo da recusa do token; só as rotas com requer_autenticacao respondem 401 por ele
+    g.erro_autenticacao = None
+
+    cabecalho = request.headers.get('Authorization', '')
+    if request.method == 'OPTIONS' or not cabecalho.startswith('Bearer '):
+        return None
+
+    token = cabecalho[len('Bearer '):].strip()
+    try:
+        payload = decodificar_token(token)
+        # Tokens de uso específico (ex.: recuperação de senha) não autenticam requisições
+        if 'action' in payload:
+            raise jwt.InvalidTokenError()
+        g.user_id = payload['user_id']
+    except jwt.ExpiredSignatureError:
+        g.erro_autenticacao = "Token expirado"
+    except TokenRevogadoError:
+        g.erro_autenticacao = "Token revogado"
+    except (jwt.InvalidTokenError, KeyError):
+        g.erro_autenticacao = "Token inválido"
+
+    return None
+
+
+def requer_autenticacao(view=None, *, permitir_sem_token=False):
+    """Decorator das rotas que precisam do usuário autenticado: responde 401 quando o token
+    enviado foi recusado. Com permitir_sem_token, requisição sem token segue com g.user_id = None"""
+
+    def decorar(funcao):
+        @wraps(funcao)
+        def verificar(*args, **kwargs):
+            if g.get('erro_autenticacao'):
+                return make_response(jsonify({"erro": g.erro_autenticacao}), 401)
+            if g.get('user_id') is None and not permitir_sem_token:
+                return make_response(jsonify({"erro": "Autenticação necessária"}), 401)
+            return funcao(*args, **kwargs)
+        return verificar
+
+    return decorar(view) if view is not None else decorar
+
+
 def logout_usuario(token):
-    """Realiza logout do usuário (pode ser usado para blacklist de tokens)"""
-    # Em uma implementação mais robusta, você poderia adicionar o token
-    # a uma blacklist no Redis ou banco de dados
-    return {"sucesso": True, "mensagem": "Logout realizado com sucesso"}
+    """Realiza logout do usuário, revogando o token até a sua expiração"""
+    try:
+        payload = decodificar_token(token)
+
+        if 'jti' in payload:
+            revogacao_tokens.revogar(payload['jti'], payload['exp'], payload.get('user_id'))
+        else:
+            # Tokens antigos, sem jti: revoga os tokens do usuário emitidos até agora
+            revogacao_tokens.revogar_usuario(payload['user_id'], time.time(), payload['exp'])
+        cache_tokens.remover(token)
+
+        return {"sucesso": True, "mensagem": "Logout realizado com sucesso"}
+    except (jwt.ExpiredSignatureError, TokenRevogadoError):
+        # Token que já não vale mais: nada a revogar
+        return {"sucesso": True, "mensagem": "Logout realizado com sucesso"}
+    except (jwt.InvalidTokenError, KeyError):
+        return {"erro": "Token inválido"}
+    except Exception as e:
+        return {"erro": f"Erro ao realizar logout: {str(e)}"}
 
 
 def trocar_senha(user_id, senha_atual, senha_nova):
@@ -89,6 +182,10 @@ def trocar_senha(user_id, senha_atual, senha_nova):
         usuario.gen_senha(senha_nova)
         db.session.commit()
         
+        # Tokens emitidos com a senha antiga deixam de valer imediatamente
+        agora = time.time()
+        revogacao_tokens.revogar_usuario(user_id, agora, agora + VALIDADE_TOKEN.total_seconds())
+        
         return {"sucesso": True, "mensagem": "Senha alterada com sucesso"}
         
     except Exception as e:
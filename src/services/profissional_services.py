@@ -14,12 +14,11 @@ def cadastrar_profissional(profissional_entity):
 
 
 def listar_profissionais():
-    """Lista todos os profissionais"""
-    profissionais_db = ProfissionalModel.query.all()
-    profissionais_entities = [
-        Profissional(p.nome) for p in profissionais_db
-    ]
-    return profissionais_entities
+    """Lista id e nome de todos os profissionais em uma única consulta"""
+    # Linhas leves (id, nome) direto da projeção, sem montar objetos do ORM
+    return db.session.query(
+        ProfissionalModel.id, ProfissionalModel.nome
+    ).order_by(ProfissionalModel.id).all()
 
 
 def listar_profissional_id(id):
@@ -0,0 +1,198 @@
+# Lista de tokens revogados (logout e troca de senha)
+# Cada token leva um jti; o logout revoga aquele jti até o exp do token e a troca de
+# senha revoga todos os tokens do usuário emitidos até aquele momento. A consulta roda
+# em toda requisição autenticada, então um filtro de Bloom responde o caso comum
+# (token não revogado) sem olhar o dicionário nem o banco.
+# Sem persistência (TOKENS_REVOGADOS_PERSISTIR) a lista existe só no processo que
+# atendeu o logout/troca de senha: com vários workers, os demais continuam aceitando o
+# token. Com persistência, cada processo busca as revogações novas no banco a cada
+# TOKENS_REVOGADOS_RECARGA_SEGUNDOS (0 = em toda requisição autenticada)
+
+import calendar
+import hashlib
+import heapq
+import time
+from datetime import datetime
+from threading import RLock
+from typing import Dict
+
+
+class FiltroBloom:
+    """Filtro de Bloom de tamanho fixo: sem falsos negativos, poucos falsos positivos"""
+
+    def __init__(self, bits: int = 1 << 20, funcoes: int = 4):
+        self.bits = bits
+        self.funcoes = funcoes
+        self._mapa = bytearray(bits // 8)
+
+    def _posicoes(self, chave: str):
+        digest = hashlib.blake2b(chave.encode(), digest_size=4 * self.funcoes).digest()
+        for i in range(self.funcoes):
+            yield int.from_bytes(digest[4 * i:4 * i + 4], 'little') % self.bits
+
+    def adicionar(self, chave: str):
+        for posicao in self._posicoes(chave):
+            self._mapa[posicao >> 3] |= 1 << (posicao & 7)
+
+    def __contains__(self, chave: str) -> bool:
+        return all(self._mapa[posicao >> 3] & (1 << (posicao & 7))
+                   for posicao in self._posicoes(chave))
+
+
+def _timestamp(data: datetime) -> float:
+    """Timestamp de uma data UTC sem fuso, como o PyJWT grava iat/exp"""
+
+    return calendar.timegm(data.utctimetuple()) + data.microsecond / 1e6
+
+
+class RevogacaoTokens:
+    """Tokens revogados por jti e por usuário, expirando junto com os tokens"""
+
+    # Intervalo padrão para buscar no banco revogações feitas por outros processos
+    RECARGA_SEGUNDOS = 1
+
+    def __init__(self, persistir: bool = None, recarga_segundos: float = None):
+        self.persistir = persistir
+        self.recarga_segundos = recarga_segundos
+        self._jtis = {}  # jti -> exp (timestamp)
+        self._usuarios = {}  # id do usuário -> (revogados até, exp da revogação)
+        self._expiracoes = []  # heap de (exp, tipo, chave)
+        self._filtro = FiltroBloom()
+        self._removidos_do_filtro = 0
+        self._ultimo_id_carregado = None
+        self._recarregado_em = 0.0
+        self._lock = RLock()
+        self.consultas = 0
+        self.resolvidas_pelo_filtro = 0
+
+    def _configurar(self):
+        """Lê a configuração e carrega as revogações persistidas, na primeira vez"""
+
+        if self._ultimo_id_carregado is not None:
+            return
+
+        with self._lock:
+            if self._ultimo_id_carregado is not None:
+                return
+
+            from flask import current_app, has_app_context
+            config = current_app.config if has_app_context() else {}
+            if self.persistir is None:
+                self.persistir = bool(config.get('TOKENS_REVOGADOS_PERSISTIR'))
+            if self.recarga_segundos is None:
+                self.recarga_segundos = config.get('TOKENS_REVOGADOS_RECARGA_SEGUNDOS',
+                                                   self.RECARGA_SEGUNDOS)
+            self._ultimo_id_carregado = 0
+            if self.persistir:
+                self._recarregar()
+
+    def _recarregar(self):
+        """Traz do banco as revogações ainda válidas gravadas depois da última leitura"""
+
+        from ..models.token_revogado_model import TokenRevogadoModel
+
+        for registro in TokenRevogadoModel.find_validos(self._ultimo_id_carregado):
+            exp = _timestamp(registro.expira_em)
+            if registro.jti:
+                self._adicionar_jti(registro.jti, exp)
+            else:
+                self._adicionar_usuario(registro.id_user, _timestamp(registro.revogado_em), exp)
+            self._ultimo_id_carregado = max(self._ultimo_id_carregado, registro.id)
+        self._recarregado_em = time.monotonic()
+
+    def _adicionar_jti(self, jti: str, exp: float):
+        self._jtis[jti] = max(exp, self._jtis.get(jti, 0))
+        self._filtro.adicionar(jti)
+        heapq.heappush(self._expiracoes, (exp, 'jti', jti))
+
+    def _adicionar_usuario(self, user_id: int, revogados_ate: float, exp: float):
+        atual = self._usuarios.get(user_id)
+        if atual is None or revogados_ate > atual[0]:
+            self._usuarios[user_id] = (revogados_ate, max(exp, atual[1] if atual else 0))
+            heapq.heappush(self._expiracoes, (exp, 'usuario', user_id))
+
+    def _expurgar(self, agora: float):
+        """Remove revogações de tokens que já expiraram de qualquer forma"""
+
+        while self._expiracoes and self._expiracoes[0][0] <= agora:
+            _, tipo, chave = heapq.heappop(self._expiracoes)
+            if tipo == 'jti':
+                if self._jtis.get(chave, agora + 1) <= agora:
+                    del self._jtis[chave]
+                    self._removidos_do_filtro += 1
+            elif self._usuarios.get(chave, (0, agora + 1))[1] <= agora:
+                del self._usuarios[chave]
+
+        # O filtro não remove chaves: é refeito quando metade do que contém já saiu
+        if self._removidos_do_filtro > max(1024, len(self._jtis)):
+            self._filtro = FiltroBloom(self._filtro.bits, self._filtro.funcoes)
+            for jti in self._jtis:
+                self._filtro.adicionar(jti)
+            self._removidos_do_filtro = 0
+
+    def revogar(self, jti: str, exp: float, user_id: int = None):
+        """Revoga um token até a sua expiração (exp em timestamp, como no token)"""
+
+        self._configurar()
+        with self._lock:
+            self._adicionar_jti(jti, exp)
+            self._expurgar(time.time())
+        if self.persistir:
+            from ..models.token_revogado_model import TokenRevogadoModel
+            TokenRevogadoModel(jti=jti, id_user=user_id, revogado_em=datetime.utcnow(),
+                               expira_em=datetime.utcfromtimestamp(exp)).salvar()
+
+    def revogar_usuario(self, user_id: int, revogados_ate: float, exp: float):
+        """Revoga os tokens do usuário emitidos antes de revogados_ate; exp é o fim da validade deles"""
+
+        self._configurar()
+        with self._lock:
+            self._adicionar_usuario(user_id, revogados_ate, exp)
+            self._expurgar(time.time())
+        if self.persistir:
+            from ..models.token_revogado_model import TokenRevogadoModel
+            TokenRevogadoModel(jti=None, id_user=user_id,
+                               revogado_em=datetime.utcfromtimestamp(revogados_ate),
+                               expira_em=datetime.utcfromtimestamp(exp)).salvar()
+
+    def revogado(self, payload: Dict) -> bool:
+        """Diz se o token com essas claims foi revogado"""
+
+        self._configurar()
+        agora = time.time()
+
+        if self.persistir and time.monotonic() - self._recarregado_em >= self.recarga_segundos:
+            with self._lock:
+                self._recarregar()
+
+        with self._lock:
+            self.consultas += 1
+            if self._expiracoes and self._expiracoes[0][0] <= agora:
+                self._expurgar(agora)
+
+            # Troca de senha: tokens emitidos antes do momento da troca (iat com frações de
+            # segundo; um login logo depois da troca gera iat maior e continua valendo)
+            revogacao_usuario = self._usuarios.get(payload.get('user_id'))
+            if revogacao_usuario is not None and payload.get('iat', 0) < revogacao_usuario[0]:
+                return True
+
+            jti = payload.get('jti')
+            if jti is None or jti not in self._filtro:
+                self.resolvidas_pelo_filtro += 1
+                return False
+            return jti in self._jtis
+
+    def metricas(self) -> Dict:
+        """Tamanho da lista e consultas respondidas só pelo filtro"""
+
+        return {
+            "jtis_revogados": len(self._jtis),
+            "usuarios_revogados": len(self._usuarios),
+            "consultas": self.consultas,
+            "resolvidas_pelo_filtro": self.resolvidas_pelo_filtro,
+            "persistencia": bool(self.persistir)
+        }
+
+
+# Instância compartilhada pelo processo
+revogacao_tokens = RevogacaoTokens()
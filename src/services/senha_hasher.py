@@ -0,0 +1,88 @@
+# Hash e verificação de senhas fora da thread da requisição
+# O pbkdf2 ocupa a CPU por dezenas de milissegundos; o trabalho vai para um pool de
+# threads limitado (o hashlib libera o GIL durante o pbkdf2), de modo que vários logins
+# usam vários núcleos e, com o gevent, o hub continua atendendo as outras requisições
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Optional, Tuple
+from passlib.context import CryptContext
+
+try:
+    from gevent import monkey as _gevent_monkey
+    from gevent.threadpool import ThreadPool as _GeventThreadPool
+except ImportError:  # gevent é opcional fora do servidor de produção
+    _gevent_monkey = None
+    _GeventThreadPool = None
+
+
+class SenhaHasher:
+    """Contexto de hash de senhas com custo configurável e execução em pool"""
+
+    # Padrões usados quando a aplicação não define SENHA_PBKDF2_ROUNDS / SENHA_HASH_THREADS
+    ROUNDS_PADRAO = 29000
+    THREADS_PADRAO = os.cpu_count() or 2
+
+    def __init__(self, rounds: int = None, max_threads: int = None):
+        self.rounds = rounds
+        self.max_threads = max_threads
+        self._contexto = None
+        self._executor = None
+        self._pool_gevent = None
+        self._lock = Lock()
+
+    def _configurar(self):
+        """Lê o custo e o tamanho do pool da configuração da aplicação, na primeira vez"""
+
+        with self._lock:
+            if self._contexto is not None:
+                return
+
+            if self.rounds is None or self.max_threads is None:
+                from flask import current_app, has_app_context
+                config = current_app.config if has_app_context() else {}
+                if self.rounds is None:
+                    self.rounds = config.get('SENHA_PBKDF2_ROUNDS') or self.ROUNDS_PADRAO
+                if self.max_threads is None:
+                    self.max_threads = config.get('SENHA_HASH_THREADS') or self.THREADS_PADRAO
+
+            # "rounds" fixa mínimo e máximo: hashes com outro custo são refeitos no login
+            self._contexto = CryptContext(schemes=['pbkdf2_sha256'],
+                                          pbkdf2_sha256__rounds=self.rounds)
+
+    def _executar(self, funcao, *args):
+        """Roda a função no pool, bloqueando só a requisição (ou greenlet) que a chamou"""
+
+        if _gevent_monkey is not None and _gevent_monkey.is_module_patched('threading'):
+            if self._pool_gevent is None:
+                self._pool_gevent = _GeventThreadPool(self.max_threads)
+            return self._pool_gevent.apply(funcao, args)
+
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_threads,
+                                                        thread_name_prefix='senha-hash')
+        return self._executor.submit(funcao, *args).result()
+
+    def gerar(self, senha: str) -> str:
+        """Gera o hash da senha com o custo atual"""
+
+        self._configurar()
+        return self._executar(self._contexto.hash, senha)
+
+    def verificar(self, senha: str, hash_senha: str) -> bool:
+        """Confere a senha contra o hash guardado"""
+
+        return self.verificar_e_atualizar(senha, hash_senha)[0]
+
+    def verificar_e_atualizar(self, senha: str, hash_senha: str) -> Tuple[bool, Optional[str]]:
+        """Confere a senha e, se o hash usa parâmetros antigos, retorna um novo hash"""
+
+        self._configurar()
+        return self._executar(self._contexto.verify_and_update, senha, hash_senha)
+
+
+# Instância compartilhada pelo processo
+senha_hasher = SenhaHasher()
@@ -1,5 +1,6 @@
 from ..models.servicos_model import ServicoModel
 from ..entities.servico import Servico
+from .catalogo_servicos import catalogo_servicos
 from src import db
 
 
@@ -12,6 +13,7 @@ def cadastrar_servico(servico_entity):
     
     db.session.add(servico_db)
     db.session.commit()
+    catalogo_servicos.invalidar()
     return servico_db
 
 
@@ -58,6 +60,7 @@ def editar_servico(id, servico_entity):
     servico_db.horario_duracao = servico_entity.horario_duracao
     
     db.session.commit()
+    catalogo_servicos.invalidar()
     
     return Servico(
         descricao=servico_db.descricao,
@@ -83,6 +86,7 @@ def excluir_servico(id):
         
         db.session.delete(servico_db)
         db.session.commit()
+        catalogo_servicos.invalidar()
         return True
     
     return False
@@ -0,0 +1,88 @@
+# Pedido de agendamento validado uma única vez e compartilhado entre view e service
+# Usuário, profissional e serviços referenciados são resolvidos juntos, evitando
+# que cada camada repita as mesmas buscas por id
+
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import select
+from ..models.usuario_model import UsuarioModel
+from ..models.profissional_model import ProfissionalModel
+from .catalogo_servicos import catalogo_servicos
+from src import db
+
+
+class SolicitacaoAgendamento:
+    """Pedido de agendamento com as referências já conferidas"""
+
+    CAMPOS_OBRIGATORIOS = ['dt_atendimento', 'id_user', 'id_profissional', 'servicos_ids']
+
+    def __init__(self, dt_atendimento: datetime, id_user: int, id_profissional: int,
+                 servicos_ids: List[int], observacoes: str = None):
+        self.dt_atendimento = dt_atendimento
+        self.id_user = id_user
+        self.id_profissional = id_profissional
+        self.servicos_ids = servicos_ids
+        self.observacoes = observacoes
+        # Preenchidos por resolver()
+        self.servicos = None
+        self.resolvida = False
+
+    @staticmethod
+    def de_dados(dados: Dict) -> Tuple[Optional['SolicitacaoAgendamento'], Optional[Tuple[str, int]]]:
+        """Monta a solicitação a partir do JSON recebido, retornando (solicitacao, (erro, status))"""
+
+        if not isinstance(dados, dict):
+            return None, ("Corpo da requisição inválido", 400)
+
+        for campo in SolicitacaoAgendamento.CAMPOS_OBRIGATORIOS:
+            if campo not in dados:
+                return None, (f"Campo '{campo}' é obrigatório", 400)
+
+        try:
+            dt_atendimento = datetime.fromisoformat(dados['dt_atendimento'])
+        except (ValueError, TypeError):
+            return None, ("Formato de data/hora inválido", 400)
+
+        servicos_ids = dados.get('servicos_ids', [])
+        if not isinstance(servicos_ids, list) or len(servicos_ids) == 0:
+            return None, ("Lista de serviços inválida ou vazia", 400)
+
+        return SolicitacaoAgendamento(
+            dt_atendimento=dt_atendimento,
+            id_user=dados['id_user'],
+            id_profissional=dados['id_profissional'],
+            servicos_ids=servicos_ids,
+            observacoes=dados.get('observacoes')
+        ), None
+
+    def resolver(self) -> Optional[Tuple[str, int]]:
+        """Confere usuário, profissional e serviços; retorna (erro, status) se algo faltar"""
+
+        if self.resolvida:
+            return None
+
+        # Usuário e profissional conferidos na mesma consulta
+        usuario_id, profissional_id = db.session.query(
+            select(UsuarioModel.id).where(UsuarioModel.id == self.id_user).scalar_subquery(),
+            select(ProfissionalModel.id).where(ProfissionalModel.id == self.id_profissional).scalar_subquery()
+        ).one()
+
+        if usuario_id is None:
+            return ("Usuário não encontrado", 404)
+
+        if profissional_id is None:
+            return ("Profissional não encontrado", 404)
+
+        # Serviços vêm do catálogo em memória
+        try:
+            encontrados = catalogo_servicos.obter_varios(self.servicos_ids)
+        except TypeError:
+            return ("Lista de serviços inválida ou vazia", 400)
+
+        for servico_id in self.servicos_ids:
+            if servico_id not in encontrados:
+                return (f"Serviço com ID {servico_id} não encontrado", 404)
+
+        self.servicos = [encontrados[servico_id] for servico_id in self.servicos_ids]
+        self.resolvida = True
+        return None
@@ -1,15 +1,23 @@
 # src/views/agendamento_view.py
 
+import json
 from flask_restful import Resource
-from flask import request, jsonify, make_response
+from flask import request, jsonify, make_response, g
+from sqlalchemy.orm import joinedload
 from marshmallow import ValidationError
 from datetime import datetime
 from src import api, db
 from src.services.agendamento_services import AgendamentoService
-from src.models.agendamento_model import AgendamentoModel
+from src.services.solicitacao_agendamento import SolicitacaoAgendamento
+from src.services.exportacao_agendamentos import FORMATOS, resposta_exportacao
+from src.models.agendamento_model import AgendamentoModel, ConflitoHorarioError
 from src.models.usuario_model import UsuarioModel
-from src.models.profissional_model import ProfissionalModel
-from src.models.servicos_model import ServicoModel
+from src.services.catalogo_servicos import catalogo_servicos
+from src.services.cache_disponibilidade import cache_disponibilidade
+from src.services.cache_tokens import cache_tokens
+from src.services.revogacao_tokens import revogacao_tokens
+from src.services.auditoria_login import auditoria_login
+from src.services.login_services import requer_autenticacao
 
 
 class AgendamentoList(Resource):
@@ -24,6 +32,19 @@ class AgendamentoList(Resource):
             status = request.args.get('status')
             data_inicio = request.args.get('data_inicio')
             data_fim = request.args.get('data_fim')
+            limite = request.args.get('limit', type=int)
+            cursor = request.args.get('cursor')
+            formato = request.args.get('formato')
+            
+            if limite is not None and limite < 1:
+                return make_response(
+                    jsonify({"erro": "O parâmetro limit deve ser maior que zero"}), 400
+                )
+            
+            if formato and formato not in FORMATOS:
+                return make_response(
+                    jsonify({"erro": "Formato de exportação inválido. Use ndjson ou json"}), 400
+                )
             
             # Constrói query base
             query = AgendamentoModel.query
@@ -56,8 +77,27 @@ class AgendamentoList(Resource):
                         jsonify({"erro": "Formato de data_fim inválido"}), 400
                     )
             
-            # Executa query
-            agendamentos = query.order_by(AgendamentoModel.dt_atendimento.desc()).all()
+            # Exportação: todos os registros filtrados, enviados em fluxo
+            if formato:
+                return resposta_exportacao(query, formato)
+            
+            # Traz usuário, profissional e serviço no mesmo SELECT para não
+            # disparar uma consulta por linha
+            query = query.options(
+                joinedload(AgendamentoModel.usuario),
+                joinedload(AgendamentoModel.profissional),
+                joinedload(AgendamentoModel.servico)
+            )
+            
+            # Executa query paginada do mais recente para o mais antigo
+            try:
+                agendamentos, proximo_cursor = AgendamentoModel.paginar(
+                    query, limite, cursor, decrescente=True
+                )
+            except ValueError:
+                return make_response(
+                    jsonify({"erro": "Cursor inválido"}), 400
+                )
             
             # Prepara resposta detalhada
             resultado = []
@@ -92,7 +132,8 @@ class AgendamentoList(Resource):
             return make_response(
                 jsonify({
                     "agendamentos": resultado,
-                    "total": len(resultado)
+                    "total": len(resultado),
+                    "next_cursor": proximo_cursor
                 }), 200
             )
             
@@ -104,69 +145,77 @@ class AgendamentoList(Resource):
     def post(self):
         """Cria um novo agendamento"""
         try:
-            dados = request.json
+            # Monta a solicitação validando campos obrigatórios e formato
+            solicitacao, erro = SolicitacaoAgendamento.de_dados(request.get_json(silent=True))
+            if erro:
+                return make_response(jsonify({"erro": erro[0]}), erro[1])
             
-            # Validação dos campos obrigatórios
-            campos_obrigatorios = ['dt_atendimento', 'id_user', 'id_profissional', 'servicos_ids']
-            for campo in campos_obrigatorios:
-                if campo not in dados:
-                    return make_response(
-                        jsonify({"erro": f"Campo '{campo}' é obrigatório"}), 400
-                    )
+            # Confere usuário, profissional e serviços de uma só vez
+            erro = solicitacao.resolver()
+            if erro:
+                return make_response(jsonify({"erro": erro[0]}), erro[1])
             
-            # Converte string de data para datetime
-            try:
-                dt_atendimento = datetime.fromisoformat(dados['dt_atendimento'])
-            except (ValueError, TypeError):
-                return make_response(
-                    jsonify({"erro": "Formato de data/hora inválido"}), 400
-                )
+            # Chama o service com as referências já resolvidas
+            resultado = AgendamentoService.criar_agendamento_solicitacao(solicitacao)
             
-            # Valida se o usuário existe
-            usuario = UsuarioModel.query.get(dados['id_user'])
-            if not usuario:
-                return make_response(
-                    jsonify({"erro": "Usuário não encontrado"}), 404
-                )
+            if "erro" in resultado:
+                return make_response(jsonify(resultado), 400)
+            
+            return make_response(jsonify(resultado), 201)
             
-            # Valida se o profissional existe
-            profissional = ProfissionalModel.query.get(dados['id_profissional'])
-            if not profissional:
+        except Exception as e:
+            return make_response(
+                jsonify({"erro": f"Erro ao criar agendamento: {str(e)}"}), 500
+            )
+
+
+class AgendamentoImportacao(Resource):
+    """Recurso para importar agendamentos em lote"""
+    
+    def post(self):
+        """Importa uma lista JSON ou um fluxo NDJSON de agendamentos"""
+        try:
+            # NDJSON: um agendamento por linha, lido do corpo sem montar um único documento
+            if request.mimetype in ('application/x-ndjson', 'application/ndjson'):
+                itens = []
+                try:
+                    for linha in request.stream:
+                        if not linha.strip():
+                            continue
+                        # Para de ler assim que o lote passa do limite, sem consumir o resto
+                        if len(itens) >= AgendamentoService.LIMITE_IMPORTACAO:
+                            return make_response(
+                                jsonify({"erro": f"Máximo de {AgendamentoService.LIMITE_IMPORTACAO} agendamentos por lote"}), 400
+                            )
+                        itens.append(json.loads(linha))
+                except ValueError:
+                    return make_response(
+                        jsonify({"erro": f"Linha {len(itens) + 1} não é um JSON válido"}), 400
+                    )
+            else:
+                dados = request.get_json(silent=True)
+                itens = dados.get('agendamentos') if isinstance(dados, dict) else dados
+            
+            if not isinstance(itens, list) or len(itens) == 0:
                 return make_response(
-                    jsonify({"erro": "Profissional não encontrado"}), 404
+                    jsonify({"erro": "Lista de agendamentos inválida ou vazia"}), 400
                 )
             
-            # Valida se os serviços existem
-            servicos_ids = dados.get('servicos_ids', [])
-            if not isinstance(servicos_ids, list) or len(servicos_ids) == 0:
+            if len(itens) > AgendamentoService.LIMITE_IMPORTACAO:
                 return make_response(
-                    jsonify({"erro": "Lista de serviços inválida ou vazia"}), 400
+                    jsonify({"erro": f"Máximo de {AgendamentoService.LIMITE_IMPORTACAO} agendamentos por lote"}), 400
                 )
             
-            for servico_id in servicos_ids:
-                servico = ServicoModel.query.get(servico_id)
-                if not servico:
-                    return make_response(
-                        jsonify({"erro": f"Serviço com ID {servico_id} não encontrado"}), 404
-                    )
-            
-            # Chama o service para criar o agendamento
-            resultado = AgendamentoService.criar_agendamento(
-                dt_atendimento=dt_atendimento,
-                id_user=dados['id_user'],
-                id_profissional=dados['id_profissional'],
-                servicos_ids=servicos_ids,
-                observacoes=dados.get('observacoes')
-            )
+            resultado = AgendamentoService.importar_agendamentos(itens)
             
             if "erro" in resultado:
                 return make_response(jsonify(resultado), 400)
             
-            return make_response(jsonify(resultado), 201)
+            return make_response(jsonify(resultado), 200)
             
         except Exception as e:
             return make_response(
-                jsonify({"erro": f"Erro ao criar agendamento: {str(e)}"}), 500
+                jsonify({"erro": f"Erro ao importar agendamentos: {str(e)}"}), 500
             )
 
 
@@ -249,12 +298,11 @@ class AgendamentoResource(Resource):
                             
                             # Verifica disponibilidade para nova data
                             nova_dt = atualizacoes[campo]
-                            servico = ServicoModel.query.get(agendamento.id_servico)
-                            duracao = servico.horario_duracao if servico else 60
-                            dt_fim = nova_dt + timedelta(minutes=duracao)
+                            dt_fim = nova_dt + (agendamento.dt_fim - agendamento.dt_atendimento)
                             
                             if not AgendamentoService._verificar_disponibilidade(
-                                agendamento.id_profissional, nova_dt, dt_fim
+                                agendamento.id_profissional, nova_dt, dt_fim,
+                                ignorar_id=agendamento.id
                             ):
                                 return make_response(
                                     jsonify({"erro": "Novo horário não está disponível"}), 400
@@ -266,8 +314,13 @@ class AgendamentoResource(Resource):
                     else:
                         atualizacoes[campo] = dados[campo]
             
-            # Atualiza o agendamento
-            agendamento.atualizar(**atualizacoes)
+            # Atualiza o agendamento (a disponibilidade é conferida de novo na transação)
+            try:
+                agendamento.atualizar(**atualizacoes)
+            except ConflitoHorarioError:
+                return make_response(
+                    jsonify({"erro": "Novo horário não está disponível"}), 400
+                )
             
             return make_response(
                 jsonify({
@@ -281,13 +334,19 @@ class AgendamentoResource(Resource):
                 jsonify({"erro": f"Erro ao atualizar agendamento: {str(e)}"}), 500
             )
     
+    # Token recusado responde 401; sem token (ainda não há rota de login) vale o user_id informado
+    @requer_autenticacao(permitir_sem_token=True)
     def delete(self, id_agendamento):
         """Cancela um agendamento"""
         try:
-            # Obtém user_id dos parâmetros ou do corpo da requisição
-            user_id = request.args.get('user_id', type=int)
-            if not user_id and request.json:
-                user_id = request.json.get('user_id')
+            # Usuário do token Bearer; sem token, aceita user_id dos parâmetros ou do corpo
+            user_id = g.user_id
+            if not user_id:
+                user_id = request.args.get('user_id', type=int)
+            if not user_id:
+                dados = request.get_json(silent=True)
+                if isinstance(dados, dict):
+                    user_id = dados.get('user_id')
             
             if not user_id:
                 return make_response(
@@ -350,6 +409,58 @@ class HorariosDisponiveis(Resource):
             )
 
 
+class HorariosDisponiveisLote(Resource):
+    """Recurso para consultar horários disponíveis de vários profissionais e dias"""
+    
+    def get(self):
+        """Lista horários disponíveis por profissional e por dia em um período"""
+        try:
+            # Aceita ?profissionais_ids=1,2,3 ou o parâmetro repetido
+            profissionais_ids = []
+            try:
+                for valor in request.args.getlist('profissionais_ids'):
+                    profissionais_ids += [int(p_id) for p_id in valor.split(',') if p_id.strip()]
+            except ValueError:
+                return make_response(
+                    jsonify({"erro": "Lista de profissionais inválida"}), 400
+                )
+            
+            data_inicio = request.args.get('data_inicio')
+            data_fim = request.args.get('data_fim', data_inicio)
+            
+            if not profissionais_ids:
+                return make_response(
+                    jsonify({"erro": "IDs dos profissionais são obrigatórios"}), 400
+                )
+            
+            if not data_inicio:
+                return make_response(
+                    jsonify({"erro": "data_inicio é obrigatória"}), 400
+                )
+            
+            try:
+                data_inicio_obj = datetime.fromisoformat(data_inicio).date()
+                data_fim_obj = datetime.fromisoformat(data_fim).date()
+            except ValueError:
+                return make_response(
+                    jsonify({"erro": "Formato de data inválido"}), 400
+                )
+            
+            resultado = AgendamentoService.listar_horarios_disponiveis_lote(
+                profissionais_ids, data_inicio_obj, data_fim_obj
+            )
+            
+            if "erro" in resultado:
+                return make_response(jsonify(resultado), 400)
+            
+            return make_response(jsonify(resultado), 200)
+            
+        except Exception as e:
+            return make_response(
+                jsonify({"erro": f"Erro ao buscar horários: {str(e)}"}), 500
+            )
+
+
 class AgendamentosPorUsuario(Resource):
     """Recurso para listar agendamentos de um usuário específico"""
     
@@ -367,6 +478,13 @@ class AgendamentosPorUsuario(Resource):
             status = request.args.get('status')
             data_inicio = request.args.get('data_inicio')
             data_fim = request.args.get('data_fim')
+            limite = request.args.get('limit', type=int)
+            cursor = request.args.get('cursor')
+            
+            if limite is not None and limite < 1:
+                return make_response(
+                    jsonify({"erro": "O parâmetro limit deve ser maior que zero"}), 400
+                )
             
             # Converte datas se fornecidas
             dt_inicio = None
@@ -390,7 +508,7 @@ class AgendamentosPorUsuario(Resource):
             
             # Chama o service
             resultado = AgendamentoService.listar_agendamentos_usuario(
-                id_usuario, status, dt_inicio, dt_fim
+                id_usuario, status, dt_inicio, dt_fim, limite, cursor
             )
             
             if "erro" in resultado:
@@ -404,8 +522,27 @@ class AgendamentosPorUsuario(Resource):
             )
 
 
+class MetricasCache(Resource):
+    """Recurso para acompanhar os caches em memória do processo"""
+    
+    def get(self):
+        """Retorna acertos, falhas e tempos de reconstrução dos caches"""
+        return make_response(
+            jsonify({
+                "disponibilidade": cache_disponibilidade.metricas(),
+                "catalogo_servicos": catalogo_servicos.metricas(),
+                "tokens": cache_tokens.metricas(),
+                "tokens_revogados": revogacao_tokens.metricas(),
+                "auditoria_login": auditoria_login.metricas()
+            }), 200
+        )
+
+
 # Registra as rotas
 api.add_resource(AgendamentoList, '/agendamentos')
+api.add_resource(AgendamentoImportacao, '/agendamentos/importacao')
 api.add_resource(AgendamentoResource, '/agendamentos/<int:id_agendamento>')
 api.add_resource(HorariosDisponiveis, '/agendamentos/horarios-disponiveis')
-api.add_resource(AgendamentosPorUsuario, '/usuarios/<int:id_usuario>/agendamentos')
\ No newline at end of file
+api.add_resource(HorariosDisponiveisLote, '/agendamentos/horarios-disponiveis/lote')
+api.add_resource(AgendamentosPorUsuario, '/usuarios/<int:id_usuario>/agendamentos')
+api.add_resource(MetricasCache, '/metricas/cache')
\ No newline at end of file
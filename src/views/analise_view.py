@@ -0,0 +1,81 @@
+# src/views/analise_view.py
+
+from flask_restful import Resource
+from flask import request, jsonify, make_response
+from datetime import date, timedelta
+from src import api
+from src.services import analise_services
+
+
+# Período padrão das análises quando data_inicio/data_fim não são informadas
+DIAS_PADRAO = 90
+
+
+def _ler_filtros():
+    """Lê período e profissionais da query string, retornando (filtros, erro)"""
+
+    # Aceita ?profissionais_ids=1,2,3 ou o parâmetro repetido
+    profissionais_ids = []
+    try:
+        for valor in request.args.getlist('profissionais_ids'):
+            profissionais_ids += [int(p_id) for p_id in valor.split(',') if p_id.strip()]
+    except ValueError:
+        return None, "Lista de profissionais inválida"
+
+    data_inicio = request.args.get('data_inicio')
+    data_fim = request.args.get('data_fim')
+
+    try:
+        data_fim_obj = date.fromisoformat(data_fim) if data_fim else date.today()
+        data_inicio_obj = (date.fromisoformat(data_inicio) if data_inicio
+                           else data_fim_obj - timedelta(days=DIAS_PADRAO))
+    except ValueError:
+        return None, "Formato de data inválido. Use YYYY-MM-DD"
+
+    if data_inicio_obj > data_fim_obj:
+        return None, "Data inicial deve ser anterior à data final"
+
+    return (data_inicio_obj, data_fim_obj, profissionais_ids or None), None
+
+
+class ReceitaSemanal(Resource):
+    """Recurso para a receita por profissional e por semana"""
+
+    def get(self):
+        """Receita, agendamentos e taxas de cancelamento por profissional e semana"""
+        try:
+            filtros, erro = _ler_filtros()
+            if erro:
+                return make_response(jsonify({"erro": erro}), 400)
+
+            resultado = analise_services.receita_semanal(*filtros)
+            return make_response(jsonify(resultado), 200)
+
+        except Exception as e:
+            return make_response(
+                jsonify({"erro": f"Erro ao calcular receita: {str(e)}"}), 500
+            )
+
+
+class Cancelamentos(Resource):
+    """Recurso para os índices de cancelamento por profissional"""
+
+    def get(self):
+        """Cancelamentos, índice de cancelamento e taxas cobradas por profissional"""
+        try:
+            filtros, erro = _ler_filtros()
+            if erro:
+                return make_response(jsonify({"erro": erro}), 400)
+
+            resultado = analise_services.cancelamentos(*filtros)
+            return make_response(jsonify(resultado), 200)
+
+        except Exception as e:
+            return make_response(
+                jsonify({"erro": f"Erro ao calcular cancelamentos: {str(e)}"}), 500
+            )
+
+
+# Registra as rotas
+api.add_resource(ReceitaSemanal, '/analises/receita-semanal')
+api.add_resource(Cancelamentos, '/analises/cancelamentos')
@@ -3,12 +3,14 @@
 from flask_restful import Resource
 from flask import request, jsonify, make_response
 from marshmallow import ValidationError, Schema, fields
+from sqlalchemy.orm import joinedload
 from src import api, db
-from src.services import profissional_services
+from src.services import profissional_services, estatisticas_services
+from src.services.exportacao_agendamentos import FORMATOS, resposta_exportacao
 from src.models.profissional_model import ProfissionalModel
 from src.models.agendamento_model import AgendamentoModel
 from src.entities.profissional import Profissional
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 
 # Schema simples para validação (já que o schema estava incorreto no projeto)
@@ -26,29 +28,26 @@ class ProfissionalList(Resource):
             profissionais = profissional_services.listar_profissionais()
             
             if not profissionais:
-                return make_response(
+                resposta = make_response(
                     jsonify({
                         "mensagem": "Nenhum profissional cadastrado",
                         "profissionais": []
                     }), 200
                 )
+            else:
+                resultado = [{'id': prof.id, 'nome': prof.nome} for prof in profissionais]
+                
+                resposta = make_response(
+                    jsonify({
+                        "profissionais": resultado,
+                        "total": len(resultado)
+                    }), 200
+                )
             
-            # Serializa os dados
-            resultado = []
-            for prof in profissionais:
-                # Busca o modelo para obter o ID
-                prof_model = ProfissionalModel.query.filter_by(nome=prof.nome).first()
-                resultado.append({
-                    'id': prof_model.id if prof_model else None,
-                    'nome': prof.nome
-                })
-            
-            return make_response(
-                jsonify({
-                    "profissionais": resultado,
-                    "total": len(resultado)
-                }), 200
-            )
+            # A lista muda pouco: o cliente revalida com If-None-Match e recebe 304 sem corpo
+            resposta.add_etag()
+            resposta.headers['Cache-Control'] = 'no-cache'
+            return resposta.make_conditional(request)
             
         except Exception as e:
             return make_response(
@@ -113,24 +112,8 @@ class ProfissionalResource(Resource):
                     jsonify({"erro": "Profissional não encontrado"}), 404
                 )
             
-            # Busca informações adicionais
-            prof_model = ProfissionalModel.query.get(id_profissional)
-            
-            # Conta agendamentos
-            total_agendamentos = AgendamentoModel.query.filter_by(
-                id_profissional=id_profissional
-            ).count()
-            
-            agendamentos_hoje = AgendamentoModel.query.filter(
-                AgendamentoModel.id_profissional == id_profissional,
-                AgendamentoModel.dt_atendimento >= datetime.now().replace(
-                    hour=0, minute=0, second=0, microsecond=0
-                ),
-                AgendamentoModel.dt_atendimento < datetime.now().replace(
-                    hour=23, minute=59, second=59, microsecond=999999
-                ),
-                AgendamentoModel.status == 'agendado'
-            ).count()
+            # Totais lidos dos resumos diários, sem varrer os agendamentos
+            estatisticas = estatisticas_services.resumo_profissional(id_profissional, date.today())
             
             return make_response(
                 jsonify({
@@ -138,10 +121,7 @@ class ProfissionalResource(Resource):
                         "id": id_profissional,
                         "nome": profissional.nome
                     },
-                    "estatisticas": {
-                        "total_agendamentos": total_agendamentos,
-                        "agendamentos_hoje": agendamentos_hoje
-                    }
+                    "estatisticas": estatisticas
                 }), 200
             )
             
@@ -256,6 +236,19 @@ class ProfissionalAgendamentos(Resource):
             # Obtém parâmetros de query
             data = request.args.get('data')
             status = request.args.get('status', 'agendado')
+            limite = request.args.get('limit', type=int)
+            cursor = request.args.get('cursor')
+            formato = request.args.get('formato')
+            
+            if limite is not None and limite < 1:
+                return make_response(
+                    jsonify({"erro": "O parâmetro limit deve ser maior que zero"}), 400
+                )
+            
+            if formato and formato not in FORMATOS:
+                return make_response(
+                    jsonify({"erro": "Formato de exportação inválido. Use ndjson ou json"}), 400
+                )
             
             # Constrói a query
             query = AgendamentoModel.query.filter_by(id_profissional=id_profissional)
@@ -276,8 +269,22 @@ class ProfissionalAgendamentos(Resource):
                         jsonify({"erro": "Formato de data inválido"}), 400
                     )
             
-            # Ordena por data de atendimento
-            agendamentos = query.order_by(AgendamentoModel.dt_atendimento).all()
+            # Exportação: todos os registros filtrados, enviados em fluxo
+            if formato:
+                return resposta_exportacao(query, formato)
+            
+            query = query.options(
+                joinedload(AgendamentoModel.usuario),
+                joinedload(AgendamentoModel.servico)
+            )
+            
+            # Ordena por data de atendimento, uma página por vez
+            try:
+                agendamentos, proximo_cursor = AgendamentoModel.paginar(query, limite, cursor)
+            except ValueError:
+                return make_response(
+                    jsonify({"erro": "Cursor inválido"}), 400
+                )
             
             # Prepara resposta
             resultado = []
@@ -307,7 +314,8 @@ class ProfissionalAgendamentos(Resource):
                         "nome": profissional.nome
                     },
                     "agendamentos": resultado,
-                    "total": len(resultado)
+                    "total": len(resultado),
+                    "next_cursor": proximo_cursor
                 }), 200
             )
             
@@ -394,4 +402,63 @@ class ProfissionalDisponibilidade(Resource):
             
             return make_response(jsonify(resultado), 200)
             
-        except Exception as e:
\ No newline at end of file
+        except Exception as e:
+            return make_response(
+                jsonify({"erro": f"Erro ao verificar disponibilidade: {str(e)}"}), 500
+            )
+
+
+class ProfissionalEstatisticas(Resource):
+    """Recurso para as estatísticas de um profissional em um período"""
+    
+    # Período padrão quando data_inicio/data_fim não são informadas
+    DIAS_PADRAO = 30
+    
+    def get(self, id_profissional):
+        """Agendamentos por status, receita e taxas de cancelamento no período"""
+        try:
+            profissional = profissional_services.listar_profissional_id(id_profissional)
+            if not profissional:
+                return make_response(
+                    jsonify({"erro": "Profissional não encontrado"}), 404
+                )
+            
+            data_inicio = request.args.get('data_inicio')
+            data_fim = request.args.get('data_fim')
+            
+            try:
+                data_fim_obj = date.fromisoformat(data_fim) if data_fim else date.today()
+                data_inicio_obj = (date.fromisoformat(data_inicio) if data_inicio
+                                   else data_fim_obj - timedelta(days=self.DIAS_PADRAO))
+            except ValueError:
+                return make_response(
+                    jsonify({"erro": "Formato de data inválido. Use YYYY-MM-DD"}), 400
+                )
+            
+            if data_inicio_obj > data_fim_obj:
+                return make_response(
+                    jsonify({"erro": "Data inicial deve ser anterior à data final"}), 400
+                )
+            
+            resultado = estatisticas_services.estatisticas_profissional(
+                id_profissional, data_inicio_obj, data_fim_obj
+            )
+            resultado["profissional"] = {
+                "id": id_profissional,
+                "nome": profissional.nome
+            }
+            
+            return make_response(jsonify(resultado), 200)
+            
+        except Exception as e:
+            return make_response(
+                jsonify({"erro": f"Erro ao buscar estatísticas: {str(e)}"}), 500
+            )
+
+
+# Registra as rotas
+api.add_resource(ProfissionalList, '/profissionais')
+api.add_resource(ProfissionalResource, '/profissionais/<int:id_profissional>')
+api.add_resource(ProfissionalAgendamentos, '/profissionais/<int:id_profissional>/agendamentos')
+api.add_resource(ProfissionalDisponibilidade, '/profissionais/<int:id_profissional>/disponibilidade')
+api.add_resource(ProfissionalEstatisticas, '/profissionais/<int:id_profissional>/estatisticas')
\ No newline at end of file
@@ -0,0 +1,75 @@
+# Configuração comum dos testes: banco SQLite temporário com o schema das migrations
+# As variáveis de ambiente são definidas antes de importar a aplicação, já que
+# connection.py lê a configuração na importação
+
+import os
+import tempfile
+
+_PASTA_BANCO = tempfile.mkdtemp(prefix='sgu-testes-')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_PASTA_BANCO, 'testes.db')
+os.environ.setdefault('SECRET_KEY', 'chave-dos-testes')
+# Hash de senha barato, só para montar os usuários dos testes
+os.environ['SENHA_PBKDF2_ROUNDS'] = '1000'
+
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from flask_migrate import upgrade
+
+from src import app as aplicacao, db
+from src.models.profissional_model import ProfissionalModel
+from src.models.servicos_model import ServicoModel
+from src.models.usuario_model import UsuarioModel
+from src.services.cache_disponibilidade import cache_disponibilidade
+from src.services.catalogo_servicos import catalogo_servicos
+from src.services.indice_agenda import indice_agenda
+
+PASTA_MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations')
+
+
+def dia_futuro(dias: int = 30, hora: int = 9) -> datetime:
+    """Data/hora futura dentro do horário de funcionamento"""
+
+    return datetime.combine(date.today() + timedelta(days=dias), time(hora))
+
+
+@pytest.fixture(scope='session')
+def app():
+    with aplicacao.app_context():
+        upgrade(directory=PASTA_MIGRATIONS)
+    return aplicacao
+
+
+@pytest.fixture
+def banco(app):
+    """Banco vazio com um usuário, dois profissionais e dois serviços"""
+
+    with app.app_context():
+        for tabela in reversed(db.metadata.sorted_tables):
+            db.session.execute(tabela.delete())
+        db.session.commit()
+
+        usuario = UsuarioModel(nome='Cliente', email='cliente@teste', telefone='1')
+        usuario.gen_senha('senha')
+        profissionais = [ProfissionalModel(nome='Ana'), ProfissionalModel(nome='Bruno')]
+        servicos = [ServicoModel(descricao='corte tesoura', valor=50, horario_duracao=60),
+                    ServicoModel(descricao='barba', valor=20, horario_duracao=30)]
+        db.session.add_all([usuario, *profissionais, *servicos])
+        db.session.commit()
+
+        ids = {
+            'usuario': usuario.id,
+            'profissionais': [p.id for p in profissionais],
+            'servicos': [s.id for s in servicos]
+        }
+        db.session.remove()
+
+    # Caches do processo não podem carregar dados de outro teste
+    indice_agenda.invalidar()
+    cache_disponibilidade.limpar()
+    catalogo_servicos.invalidar()
+
+    yield ids
+
+    with app.app_context():
+        db.session.remove()
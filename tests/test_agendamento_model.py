@@ -0,0 +1,63 @@
+# Gravação de agendamentos pelo model
+
+from datetime import timedelta
+
+import pytest
+
+from src.models.agenda_bloqueio_model import AgendaBloqueioModel
+from src.models.agendamento_model import AgendamentoModel, ConflitoHorarioError
+from src.services.indice_agenda import indice_agenda
+from conftest import dia_futuro
+
+
+def _novo(banco, dt_atendimento):
+    return AgendamentoModel(dt_atendimento=dt_atendimento, id_user=banco['usuario'],
+                            id_profissional=banco['profissionais'][0],
+                            id_servico=banco['servicos'][0], valor_total=50)
+
+
+def test_salvar_calcula_fim_e_atualiza_indice(app, banco):
+    inicio = dia_futuro(3, 10)
+
+    with app.app_context():
+        assert indice_agenda.esta_livre(banco['profissionais'][0], inicio, inicio + timedelta(hours=1))
+
+        agendamento = _novo(banco, inicio).salvar()
+
+        assert agendamento.dt_fim == inicio + timedelta(minutes=60)
+        assert not indice_agenda.esta_livre(banco['profissionais'][0], inicio, inicio + timedelta(hours=1))
+
+
+def test_salvar_recusa_conflito(app, banco):
+    inicio = dia_futuro(3, 10)
+
+    with app.app_context():
+        _novo(banco, inicio).salvar()
+
+        with pytest.raises(ConflitoHorarioError):
+            _novo(banco, inicio + timedelta(minutes=30)).salvar()
+
+
+def test_agendas_travadas_em_ordem_de_profissional_e_dia(app, banco, monkeypatch):
+    reservas = []
+    reservar = AgendaBloqueioModel.reservar
+    monkeypatch.setattr(AgendaBloqueioModel, 'reservar', staticmethod(
+        lambda profissional_id, datas: (reservas.append((profissional_id, sorted(set(datas)))),
+                                        reservar(profissional_id, datas))))
+    primeiro, segundo = banco['profissionais']
+
+    # Lote com o segundo profissional antes do primeiro e dias fora de ordem
+    lote = []
+    for profissional_id, dias in ((segundo, 4), (primeiro, 5), (segundo, 3)):
+        agendamento = _novo(banco, dia_futuro(dias, 10))
+        agendamento.id_profissional = profissional_id
+        agendamento.dt_fim = agendamento.dt_atendimento + timedelta(hours=1)
+        lote.append(agendamento)
+
+    with app.app_context():
+        AgendamentoModel.salvar_varios(lote)
+
+    assert reservas == [
+        (primeiro, [dia_futuro(5).date()]),
+        (segundo, [dia_futuro(3).date(), dia_futuro(4).date()]),
+    ]
@@ -0,0 +1,51 @@
+# Token Bearer verificado no before_request (login_services.autenticar_requisicao)
+
+import pytest
+
+from src import db
+from src.models.agendamento_model import AgendamentoModel
+from src.services import login_services
+from conftest import dia_futuro
+
+INVALIDO = {'Authorization': 'Bearer lixo'}
+
+
+@pytest.fixture
+def agendamento_id(app, banco):
+    with app.app_context():
+        agendamento = AgendamentoModel(
+            dt_atendimento=dia_futuro(5, 10), id_user=banco['usuario'],
+            id_profissional=banco['profissionais'][0], id_servico=banco['servicos'][0],
+            valor_total=50).salvar()
+        agendamento_id = agendamento.id
+        db.session.remove()
+    return agendamento_id
+
+
+@pytest.mark.parametrize('url', ['/profissionais', '/agendamentos'])
+def test_token_invalido_nao_bloqueia_rota_publica(app, banco, url):
+    assert app.test_client().get(url, headers=INVALIDO).status_code == 200
+
+
+def test_cancelamento_com_token_invalido_responde_401(app, agendamento_id):
+    resposta = app.test_client().delete(f'/agendamentos/{agendamento_id}?user_id=1',
+                                        headers=INVALIDO)
+
+    assert resposta.status_code == 401
+    assert resposta.get_json() == {"erro": "Token inválido"}
+
+
+def test_cancelamento_usa_usuario_do_token(app, banco, agendamento_id):
+    with app.app_context():
+        token = login_services.autenticar_usuario('cliente@teste', 'senha')['token']
+
+    resposta = app.test_client().delete(f'/agendamentos/{agendamento_id}',
+                                        headers={'Authorization': f'Bearer {token}'})
+
+    assert resposta.status_code == 200
+
+
+def test_cancelamento_sem_token_aceita_user_id(app, banco, agendamento_id):
+    resposta = app.test_client().delete(f"/agendamentos/{agendamento_id}?user_id={banco['usuario']}")
+
+    assert resposta.status_code == 200
@@ -0,0 +1,137 @@
+# Estresse de concorrência na criação de agendamentos
+# Várias threads e vários processos tentam marcar os mesmos horários ao mesmo tempo;
+# ao final não pode existir nenhum par de agendamentos ativos sobrepostos para o
+# mesmo profissional. Com a conferência prévia do índice desligada, todas as
+# tentativas chegam à transação, então quem garante o resultado é a trava por
+# (profissional, dia) e a conferência de conflitos feita no banco
+
+import multiprocessing
+import random
+import threading
+from datetime import timedelta
+
+import pytest
+
+from src import db
+from src.models.agendamento_model import AgendamentoModel
+from src.services.agendamento_services import AgendamentoService
+from conftest import dia_futuro
+
+TENTATIVAS = 15
+
+
+def _horarios(banco):
+    """Horários disputados: dois dias, dois profissionais, início a cada 30 minutos"""
+
+    return [(profissional, dia_futuro(dias, 9) + timedelta(minutes=30 * passo))
+            for profissional in banco['profissionais']
+            for dias in (10, 11)
+            for passo in range(4)]
+
+
+def _tentar(app, banco, semente):
+    """Faz TENTATIVAS pedidos de agendamento e retorna (sucessos, erros inesperados)"""
+
+    sorteio = random.Random(semente)
+    horarios = _horarios(banco)
+    sucessos = 0
+    erros = []
+
+    for _ in range(TENTATIVAS):
+        profissional, dt_atendimento = sorteio.choice(horarios)
+        servicos = sorteio.choice([[banco['servicos'][0]], [banco['servicos'][1]], banco['servicos']])
+        with app.app_context():
+            resultado = AgendamentoService.criar_agendamento(
+                dt_atendimento, banco['usuario'], profissional, servicos)
+            db.session.remove()
+
+        if resultado.get('sucesso'):
+            sucessos += len(resultado['agendamentos'])
+        elif resultado['erro'] != "Horário não disponível para o profissional":
+            erros.append(resultado['erro'])
+
+    return sucessos, erros
+
+
+def _processo(app, banco, semente, barreira, fila):
+    # Conexões herdadas do processo pai não podem ser reaproveitadas
+    with app.app_context():
+        db.engine.dispose(close=False)
+    barreira.wait()
+    try:
+        fila.put(_tentar(app, banco, semente))
+    except Exception as e:
+        fila.put((0, [repr(e)]))
+
+
+def _sobreposicoes(app):
+    """Pares de agendamentos ativos sobrepostos do mesmo profissional"""
+
+    with app.app_context():
+        ativos = AgendamentoModel.query.filter(
+            AgendamentoModel.status != 'cancelado'
+        ).order_by(AgendamentoModel.id_profissional, AgendamentoModel.dt_atendimento).all()
+        db.session.remove()
+
+    pares = []
+    for anterior, atual in zip(ativos, ativos[1:]):
+        if (anterior.id_profissional == atual.id_profissional
+                and atual.dt_atendimento < anterior.dt_fim):
+            pares.append((anterior.id, atual.id))
+    return pares, len(ativos)
+
+
+@pytest.fixture
+def sem_conferencia_previa(monkeypatch):
+    """Desliga a conferência pelo índice em memória, levando todo pedido à transação"""
+
+    monkeypatch.setattr(AgendamentoService, '_verificar_disponibilidade',
+                        staticmethod(lambda *args, **kwargs: True))
+
+
+@pytest.mark.parametrize('conferencia_previa', [True, False])
+def test_threads_nao_geram_agendamento_duplo(app, banco, request, conferencia_previa):
+    if not conferencia_previa:
+        request.getfixturevalue('sem_conferencia_previa')
+
+    resultados = []
+    barreira = threading.Barrier(8)
+
+    def executar(semente):
+        barreira.wait()
+        resultados.append(_tentar(app, banco, semente))
+
+    threads = [threading.Thread(target=executar, args=(semente,)) for semente in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    sobrepostos, ativos = _sobreposicoes(app)
+    assert [erro for _, erros in resultados for erro in erros] == []
+    assert sobrepostos == []
+    assert ativos == sum(sucessos for sucessos, _ in resultados) > 0
+
+
+@pytest.mark.skipif('fork' not in multiprocessing.get_all_start_methods(),
+                    reason='processos criados por fork')
+@pytest.mark.parametrize('conferencia_previa', [True, False])
+def test_processos_nao_geram_agendamento_duplo(app, banco, request, conferencia_previa):
+    if not conferencia_previa:
+        request.getfixturevalue('sem_conferencia_previa')
+
+    contexto = multiprocessing.get_context('fork')
+    barreira = contexto.Barrier(6)
+    fila = contexto.Queue()
+    processos = [contexto.Process(target=_processo, args=(app, banco, semente, barreira, fila))
+                 for semente in range(6)]
+    for processo in processos:
+        processo.start()
+    resultados = [fila.get(timeout=120) for _ in processos]
+    for processo in processos:
+        processo.join()
+
+    sobrepostos, ativos = _sobreposicoes(app)
+    assert [erro for _, erros in resultados for erro in erros] == []
+    assert sobrepostos == []
+    assert ativos == sum(sucessos for sucessos, _ in resultados) > 0
@@ -0,0 +1,41 @@
+# Importação de agendamentos em lote (POST /agendamentos/importacao)
+
+import json
+from types import SimpleNamespace
+
+from src.services.agendamento_services import AgendamentoService
+from src.views import agendamento_view
+from conftest import dia_futuro
+
+
+def test_ndjson_importa_um_agendamento_por_linha(app, banco):
+    itens = [{"dt_atendimento": dia_futuro(5, hora).isoformat(), "id_user": banco['usuario'],
+              "id_profissional": banco['profissionais'][0], "servicos_ids": [banco['servicos'][0]]}
+             for hora in (9, 10, 10)]
+    corpo = '\n'.join(json.dumps(item) for item in itens) + '\n'
+
+    resposta = app.test_client().post('/agendamentos/importacao', data=corpo,
+                                      content_type='application/x-ndjson')
+
+    dados = resposta.get_json()
+    assert resposta.status_code == 200
+    assert dados['importados'] == 2 and dados['falhas'] == 1
+
+
+def test_ndjson_acima_do_limite_para_a_leitura(app, banco, monkeypatch):
+    monkeypatch.setattr(AgendamentoService, 'LIMITE_IMPORTACAO', 3)
+    linhas_lidas = []
+
+    def loads(linha):
+        linhas_lidas.append(linha)
+        return json.loads(linha)
+
+    monkeypatch.setattr(agendamento_view, 'json', SimpleNamespace(loads=loads))
+    corpo = ''.join(json.dumps({"indice": indice}) + '\n' for indice in range(1000))
+
+    resposta = app.test_client().post('/agendamentos/importacao', data=corpo,
+                                      content_type='application/x-ndjson')
+
+    assert resposta.status_code == 400
+    assert 'Máximo de 3' in resposta.get_json()['erro']
+    assert len(linhas_lidas) == 3
@@ -0,0 +1,80 @@
+# Índice em memória dos horários ocupados (IndiceAgenda)
+
+import threading
+from datetime import date, datetime, timedelta
+
+from src.services.indice_agenda import IndiceAgenda
+
+DIA = date(2031, 3, 10)
+NOVE = datetime(2031, 3, 10, 9)
+UMA_HORA = timedelta(hours=1)
+
+
+class _CarregadorBloqueante:
+    """Carregador que segura a leitura de um dia até ser liberado"""
+
+    def __init__(self, dados, dia_lento):
+        self.dados = dados
+        self.dia_lento = dia_lento
+        self.iniciou = threading.Event()
+        self.liberar = threading.Event()
+
+    def __call__(self, profissional_id, data):
+        if (profissional_id, data) == self.dia_lento:
+            self.iniciou.set()
+            assert self.liberar.wait(5)
+        return list(self.dados.get((profissional_id, data), []))
+
+
+def test_carga_de_um_dia_nao_bloqueia_os_outros():
+    carregador = _CarregadorBloqueante({}, dia_lento=(1, DIA))
+    indice = IndiceAgenda(carregador=carregador)
+    # Dia do profissional 2 já carregado
+    assert indice.esta_livre(2, NOVE, NOVE + UMA_HORA)
+
+    lenta = threading.Thread(target=indice.esta_livre, args=(1, NOVE, NOVE + UMA_HORA))
+    lenta.start()
+    assert carregador.iniciou.wait(5)
+
+    # Com a leitura do profissional 1 parada, a consulta ao profissional 2 segue
+    respondeu = []
+    outra = threading.Thread(target=lambda: respondeu.append(
+        indice.esta_livre(2, NOVE, NOVE + UMA_HORA)))
+    outra.start()
+    outra.join(2)
+    respondeu_durante_a_carga = list(respondeu)
+
+    carregador.liberar.set()
+    lenta.join(5)
+    assert respondeu_durante_a_carga == [True]
+
+
+def test_gravacao_durante_a_carga_nao_e_sobrescrita():
+    dados = {}
+    carregador = _CarregadorBloqueante(dados, dia_lento=(1, DIA))
+    indice = IndiceAgenda(carregador=carregador)
+
+    lenta = threading.Thread(target=indice.esta_livre, args=(1, NOVE, NOVE + UMA_HORA))
+    lenta.start()
+    assert carregador.iniciou.wait(5)
+
+    # O agendamento é gravado enquanto a leitura (sem ele) está em andamento
+    dados[(1, DIA)] = [(NOVE, NOVE + UMA_HORA, 10)]
+    indice.adicionar(1, 10, NOVE, NOVE + UMA_HORA)
+    carregador.liberar.set()
+    lenta.join(5)
+
+    # O resultado antigo não ficou guardado: a próxima consulta relê o dia
+    carregador.dia_lento = None
+    assert not indice.esta_livre(1, NOVE, NOVE + UMA_HORA)
+
+
+def test_conflito_e_reconferido_no_banco():
+    dados = {(1, DIA): [(NOVE, NOVE + UMA_HORA, 10)]}
+    indice = IndiceAgenda(carregador=lambda p_id, data: list(dados.get((p_id, data), [])))
+    assert not indice.esta_livre(1, NOVE, NOVE + UMA_HORA)
+
+    # Outro processo cancelou o agendamento
+    dados[(1, DIA)] = []
+
+    assert indice.esta_livre(1, NOVE, NOVE + UMA_HORA)
@@ -0,0 +1,25 @@
+# A inicialização da aplicação não pode depender do banco: sem conexão no import de
+# connection.py nem create_all a cada requisição (o schema vem das migrations).
+# Tempos de inicialização: python scripts/tempo_inicializacao.py
+
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CODIGO = '''
+from src import app
+resposta = app.test_client().get("/rota-inexistente")
+assert resposta.status_code == 404, resposta.status_code
+'''
+
+
+def test_app_sobe_e_atende_sem_acessar_o_banco(tmp_path):
+    # Banco em uma pasta que não existe: qualquer conexão aberta falharia
+    ambiente = dict(os.environ, DATABASE_URL=f'sqlite:///{tmp_path}/inexistente/banco.db')
+
+    resultado = subprocess.run([sys.executable, '-c', CODIGO], cwd=RAIZ, env=ambiente,
+                               capture_output=True, text=True)
+
+    assert resultado.returncode == 0, resultado.stderr[-2000:]
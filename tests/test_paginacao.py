@@ -0,0 +1,59 @@
+# Paginação por cursor das listagens de agendamentos
+
+from datetime import timedelta
+
+import pytest
+
+from src import db
+from src.models.agendamento_model import AgendamentoModel
+from conftest import dia_futuro
+
+
+@pytest.fixture
+def agendamentos(app, banco):
+    with app.app_context():
+        inicio = dia_futuro(1)
+        db.session.add_all([
+            AgendamentoModel(dt_atendimento=inicio + timedelta(days=i),
+                             dt_fim=inicio + timedelta(days=i, hours=1),
+                             id_user=banco['usuario'], id_profissional=banco['profissionais'][0],
+                             id_servico=banco['servicos'][0], valor_total=50)
+            for i in range(5)
+        ])
+        db.session.commit()
+        db.session.remove()
+    return banco
+
+
+@pytest.mark.parametrize('rota', [
+    '/agendamentos',
+    '/usuarios/{usuario}/agendamentos',
+    '/profissionais/{profissional}/agendamentos',
+])
+@pytest.mark.parametrize('limite', [0, -1, -3])
+def test_limite_menor_que_um_e_rejeitado(app, agendamentos, rota, limite):
+    url = rota.format(usuario=agendamentos['usuario'], profissional=agendamentos['profissionais'][0])
+
+    resposta = app.test_client().get(f'{url}?limit={limite}')
+
+    assert resposta.status_code == 400
+    assert 'limit' in resposta.get_json()['erro']
+
+
+def test_paginas_seguem_o_cursor(app, agendamentos):
+    cliente = app.test_client()
+
+    primeira = cliente.get('/agendamentos?limit=2').get_json()
+    segunda = cliente.get(f"/agendamentos?limit=2&cursor={primeira['next_cursor']}").get_json()
+
+    ids = [ag['id'] for ag in primeira['agendamentos'] + segunda['agendamentos']]
+    assert len(ids) == 4 and len(set(ids)) == 4
+
+
+def test_paginar_ajusta_limite_fora_da_faixa(app, agendamentos):
+    with app.app_context():
+        itens, proximo = AgendamentoModel.paginar(AgendamentoModel.query, -3)
+        assert len(itens) == 1 and proximo is not None
+
+        itens, proximo = AgendamentoModel.paginar(AgendamentoModel.query, 10 ** 6)
+        assert len(itens) == 5 and proximo is None
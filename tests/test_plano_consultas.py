@@ -0,0 +1,112 @@
+# Regressão dos planos de consulta em tb_agendamentos
+# Cada consulta frequente roda de verdade, o SQL emitido é capturado e passado pelo
+# EXPLAIN QUERY PLAN do SQLite; um "SCAN tb_agendamentos" indica que a consulta deixou
+# de usar os índices da migração 3aed83291988 e passou a varrer a tabela
+
+from contextlib import contextmanager
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import event
+
+from src import db
+from src.models.agendamento_model import AgendamentoModel
+from conftest import dia_futuro
+
+TABELAS_VIGIADAS = ('tb_agendamentos', 'tb_estatistica_profissional')
+
+
+@contextmanager
+def capturar_consultas():
+    """Guarda os SELECTs executados no bloco"""
+
+    consultas = []
+
+    def registrar(conexao, cursor, sql, parametros, contexto, executemany):
+        if sql.lstrip().upper().startswith('SELECT'):
+            consultas.append((sql, parametros))
+
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        yield consultas
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+
+
+def varreduras(consultas):
+    """Linhas do plano que varrem por inteiro alguma tabela vigiada"""
+
+    encontradas = []
+    conexao = db.engine.raw_connection()
+    try:
+        cursor = conexao.cursor()
+        for sql, parametros in consultas:
+            for linha in cursor.execute('EXPLAIN QUERY PLAN ' + sql, parametros).fetchall():
+                detalhe = linha[-1]
+                if any(detalhe.startswith(f'SCAN {tabela}') for tabela in TABELAS_VIGIADAS):
+                    encontradas.append((detalhe, sql))
+    finally:
+        conexao.close()
+    return encontradas
+
+
+@pytest.fixture
+def agenda(app, banco):
+    """Alguns meses de agendamentos, para que o planejador tenha o que escolher"""
+
+    usuario = banco['usuario']
+    profissional, outro = banco['profissionais']
+    servico = banco['servicos'][0]
+    inicio = dia_futuro(1)
+
+    with app.app_context():
+        agendamentos = []
+        for i in range(600):
+            dt_atendimento = inicio + timedelta(days=i // 8, hours=i % 8)
+            agendamentos.append(AgendamentoModel(
+                dt_atendimento=dt_atendimento, dt_fim=dt_atendimento + timedelta(hours=1),
+                id_user=usuario, id_profissional=profissional if i % 2 else outro,
+                id_servico=servico, valor_total=50,
+                status='cancelado' if i % 7 == 0 else 'agendado'))
+        db.session.add_all(agendamentos)
+        db.session.commit()
+        db.session.remove()
+
+    return {'usuario': usuario, 'profissional': profissional, 'inicio': inicio}
+
+
+def test_consultas_de_agenda_usam_indice(app, agenda):
+    dia = agenda['inicio'] + timedelta(days=10)
+
+    with app.app_context(), capturar_consultas() as consultas:
+        AgendamentoModel.find_by_profissional_data(agenda['profissional'], dia.date())
+        AgendamentoModel.find_conflitos_horario(
+            agenda['profissional'], dia, dia + timedelta(hours=2))
+        AgendamentoModel.find_conflitos_horario(
+            agenda['profissional'], dia, dia + timedelta(hours=2), bloquear=True)
+
+        assert len(consultas) == 3
+        assert varreduras(consultas) == []
+
+
+@pytest.mark.parametrize('url', [
+    '/agendamentos?profissional_id={profissional}',
+    '/agendamentos?profissional_id={profissional}&status=agendado',
+    '/agendamentos?user_id={usuario}',
+    '/agendamentos?user_id={usuario}&status=agendado',
+    '/profissionais/{profissional}/agendamentos',
+    '/profissionais/{profissional}/agendamentos?data={dia}',
+    '/usuarios/{usuario}/agendamentos',
+    # agendamentos_hoje e total do perfil do profissional
+    '/profissionais/{profissional}',
+])
+def test_listagens_usam_indice(app, agenda, url):
+    url = url.format(profissional=agenda['profissional'], usuario=agenda['usuario'],
+                     dia=(agenda['inicio'] + timedelta(days=3)).date().isoformat())
+
+    with app.app_context(), capturar_consultas() as consultas:
+        resposta = app.test_client().get(url)
+
+        assert resposta.status_code == 200
+        assert consultas
+        assert varreduras(consultas) == []
@@ -0,0 +1,60 @@
+# Revogação de tokens vista por outros processos (cada instância faz o papel de um worker)
+
+import time
+
+from src.services import login_services
+from src.services.revogacao_tokens import RevogacaoTokens
+
+
+def test_revogacao_persistida_chega_ao_outro_worker(app, banco):
+    worker_logout = RevogacaoTokens(persistir=True, recarga_segundos=0)
+    outro_worker = RevogacaoTokens(persistir=True, recarga_segundos=0)
+    agora = time.time()
+    token = {'user_id': banco['usuario'], 'jti': 'abc', 'iat': agora - 10}
+
+    with app.app_context():
+        assert not outro_worker.revogado(token)
+
+        worker_logout.revogar('abc', agora + 3600, banco['usuario'])
+
+        assert outro_worker.revogado(token)
+
+
+def test_troca_de_senha_persistida_chega_ao_outro_worker(app, banco):
+    worker_troca = RevogacaoTokens(persistir=True, recarga_segundos=0)
+    outro_worker = RevogacaoTokens(persistir=True, recarga_segundos=0)
+    agora = time.time()
+    antigo = {'user_id': banco['usuario'], 'jti': 'antigo', 'iat': agora - 10}
+
+    with app.app_context():
+        assert not outro_worker.revogado(antigo)
+
+        worker_troca.revogar_usuario(banco['usuario'], agora, agora + 3600)
+
+        assert outro_worker.revogado(antigo)
+        assert not outro_worker.revogado({'user_id': banco['usuario'], 'jti': 'novo', 'iat': agora + 0.001})
+
+
+def test_sem_persistencia_a_revogacao_fica_no_processo(app, banco):
+    worker_logout = RevogacaoTokens(persistir=False)
+    outro_worker = RevogacaoTokens(persistir=False)
+    agora = time.time()
+    token = {'user_id': banco['usuario'], 'jti': 'abc', 'iat': agora - 10}
+
+    with app.app_context():
+        worker_logout.revogar('abc', agora + 3600)
+
+        assert worker_logout.revogado(token)
+        assert not outro_worker.revogado(token)
+
+
+def test_login_logo_apos_troca_de_senha_gera_token_valido(app, banco):
+    with app.app_context():
+        antigo = login_services.autenticar_usuario('cliente@teste', 'senha')['token']
+
+        assert login_services.trocar_senha(banco['usuario'], 'senha', 'nova')['sucesso']
+        novo = login_services.autenticar_usuario('cliente@teste', 'nova')['token']
+
+        # Mesmo segundo da troca: o token antigo cai e o novo vale
+        assert login_services.verificar_token(antigo) == {"valido": False, "erro": "Token revogado"}
+        assert login_services.verificar_token(novo)['valido']